@@ -3,7 +3,9 @@ Lead Scoring Agent - Configuration Management
 Centralized configuration using pydantic-settings
 """
 
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from typing import Callable, List
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 import os
 
@@ -21,6 +23,10 @@ class Settings(BaseSettings):
     api_title: str = "Lead Scoring Agent"
     api_version: str = "1.0.0"
     api_description: str = "Autonomous AI agent for lead conversion prediction"
+    disable_docs: bool = False  # Turn off /docs, /redoc and /openapi.json (production)
+    # Uvicorn processes for run.py (ignored in debug). Keep at 1: the model
+    # cache, counters and retraining lock are per process
+    workers: int = 1
     
     # Database Configuration
     database_path: str = "./data/lead_scoring.db"
@@ -31,12 +37,18 @@ class Settings(BaseSettings):
     accuracy_improvement_threshold: float = 0.02
     target_auc: float = 0.75
     
+    # Workflow: run /score through the compiled LangGraph graph instead of
+    # calling the node functions directly
+    use_langgraph: bool = False
+    
     # Logging
     log_level: str = "INFO"
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        frozen=True
+    )
     
     @property
     def database_dir(self) -> Path:
@@ -48,5 +60,40 @@ class Settings(BaseSettings):
         self.database_dir.mkdir(parents=True, exist_ok=True)
 
 
-# Global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, reading the environment on first use"""
+    return Settings()
+
+
+# Called with the new Settings by reload_settings(), so modules that bind
+# settings values to module constants at import can refresh them
+_reload_callbacks: List[Callable[[Settings], None]] = []
+
+
+def on_settings_reload(callback: Callable[[Settings], None]) -> Callable[[Settings], None]:
+    """Register a callback for reload_settings() (usable as a decorator)"""
+    _reload_callbacks.append(callback)
+    return callback
+
+
+def reload_settings() -> Settings:
+    """Re-read the environment and notify modules holding settings-derived constants"""
+    get_settings.cache_clear()
+    new_settings = get_settings()
+    for callback in _reload_callbacks:
+        callback(new_settings)
+    return new_settings
+
+
+def __getattr__(name: str):
+    """
+    Resolve the legacy `settings` global via get_settings()
+    
+    `from app.config import settings` still binds the object when the
+    importing module loads, so it does not see reload_settings(). The app
+    package calls get_settings() at use time; this remains for scripts.
+    """
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
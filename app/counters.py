@@ -0,0 +1,39 @@
+"""
+Lead Scoring Agent - In-process Counters
+Thread-safe counters for hot-path totals
+"""
+
+import threading
+
+
+class AtomicCounter:
+    """Integer counter safe to update from multiple threads"""
+    
+    def __init__(self, start: int = 0):
+        self._value = start
+        self._lock = threading.Lock()
+    
+    def inc(self, n: int = 1) -> int:
+        """Add n (may be negative) and return the new value"""
+        with self._lock:
+            self._value += n
+            return self._value
+    
+    def set(self, value: int) -> None:
+        """Reset the counter to value"""
+        with self._lock:
+            self._value = value
+    
+    @property
+    def value(self) -> int:
+        """Current value"""
+        return self._value
+
+
+# Leads scored / leads with feedback, including records still being written.
+# Seeded from the database by WriteWorker.start().
+TOTAL_SCORES = AtomicCounter()
+FEEDBACK_COUNT = AtomicCounter()
+
+# Lead score records the write worker gave up on (since process start)
+LOST_LEAD_SCORES = AtomicCounter()
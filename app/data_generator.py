@@ -1,72 +1,82 @@
 """
 Lead Scoring Agent - Synthetic Data Generator
-Generate realistic training data using Faker
+Generate realistic training data with NumPy
 """
 
-import random
+import csv
+import itertools
+import secrets
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from faker import Faker
-
-fake = Faker()
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, Union
+import numpy as np
+import pandas as pd
 
 
 class SyntheticDataGenerator:
     """Generate realistic lead data for training"""
     
     # Predefined categories for consistency
-    LOCATIONS = [
+    LOCATIONS = (
         "New York", "Los Angeles", "Chicago", "Houston", "Phoenix",
         "Philadelphia", "San Antonio", "San Diego", "Dallas", "San Jose",
         "Austin", "Seattle", "Denver", "Boston", "Miami"
-    ]
+    )
     
-    INDUSTRIES = [
+    INDUSTRIES = (
         "Technology", "Healthcare", "Finance", "Retail", "Manufacturing",
         "Education", "Real Estate", "Consulting", "Media", "Telecommunications"
-    ]
+    )
     
-    LEAD_SOURCES = [
+    LEAD_SOURCES = (
         "Webinar", "Cold Call", "Referral", "Advertisement", 
         "Organic", "Trade Show", "Email Campaign"
-    ]
+    )
+    
+    # Columns of a generated dataset (and its CSV), in order
+    DATASET_FIELDS = (
+        "lead_id", "age", "location", "industry", "email_opens",
+        "website_visits", "content_downloads", "days_since_contact",
+        "lead_source", "converted"
+    )
+    
+    # Engagement metrics drawn by the vectorized path, in _ENGAGEMENT_RANGES order
+    ENGAGEMENT_FIELDS = (
+        "email_opens", "website_visits", "content_downloads", "days_since_contact"
+    )
+    
+    # Inclusive (low, high) pairs per engagement metric,
+    # indexed by outcome: row 0 = not converted, row 1 = converted
+    _ENGAGEMENT_RANGES = np.array([
+        [0, 15, 0, 10, 0, 5, 1, 90],
+        [10, 30, 8, 20, 3, 10, 1, 30]
+    ], dtype=np.int32)
     
     def __init__(self, seed: int = 42):
         """Initialize generator with optional seed for reproducibility"""
-        Faker.seed(seed)
-        random.seed(seed)
+        # NumPy's default Generator (PCG64) backs every draw, single or bulk
+        self.rng = np.random.default_rng(seed)
+        # Auto-generated lead IDs: a random per-instance prefix (independent of
+        # the seed) plus a counter, so generators and runs don't reuse IDs
+        self._id_prefix = secrets.token_hex(4).upper()
+        self._id_counter = itertools.count(1)
     
     def _generate_engagement_pattern(self, will_convert: bool) -> Dict[str, int]:
         """
         Generate realistic engagement metrics based on conversion likelihood
         Converted leads tend to have higher engagement
         """
-        if will_convert:
-            # Higher engagement for converted leads
-            email_opens = random.randint(10, 30)
-            website_visits = random.randint(8, 20)
-            content_downloads = random.randint(3, 10)
-            days_since_contact = random.randint(1, 30)
-        else:
-            # Lower engagement for non-converted leads
-            email_opens = random.randint(0, 15)
-            website_visits = random.randint(0, 10)
-            content_downloads = random.randint(0, 5)
-            days_since_contact = random.randint(1, 90)
+        ranges = self._ENGAGEMENT_RANGES[int(will_convert)]
+        values = self.rng.integers(ranges[::2], ranges[1::2], endpoint=True)
         
-        return {
-            "email_opens": email_opens,
-            "website_visits": website_visits,
-            "content_downloads": content_downloads,
-            "days_since_contact": days_since_contact
-        }
+        return dict(zip(self.ENGAGEMENT_FIELDS, values.tolist()))
     
     def _generate_demographics(self) -> Dict[str, Any]:
         """Generate demographic information"""
         return {
-            "age": random.randint(22, 65),
-            "location": random.choice(self.LOCATIONS),
-            "industry": random.choice(self.INDUSTRIES)
+            "age": int(self.rng.integers(22, 66)),
+            "location": self.LOCATIONS[self.rng.integers(len(self.LOCATIONS))],
+            "industry": self.INDUSTRIES[self.rng.integers(len(self.INDUSTRIES))]
         }
     
     def generate_lead(self, lead_id: str = None, converted: bool = None) -> Dict[str, Any]:
@@ -81,11 +91,11 @@ class SyntheticDataGenerator:
             Dictionary with complete lead data
         """
         if lead_id is None:
-            lead_id = f"LEAD-{fake.uuid4()[:8].upper()}"
+            lead_id = f"LEAD-{self._id_prefix}-{next(self._id_counter):06d}"
         
         if converted is None:
             # 40% conversion rate for balanced dataset
-            converted = random.random() < 0.40
+            converted = bool(self.rng.random() < 0.40)
         
         demographics = self._generate_demographics()
         engagement = self._generate_engagement_pattern(converted)
@@ -99,73 +109,144 @@ class SyntheticDataGenerator:
             "website_visits": engagement["website_visits"],
             "content_downloads": engagement["content_downloads"],
             "days_since_contact": engagement["days_since_contact"],
-            "lead_source": random.choice(self.LEAD_SOURCES),
+            "lead_source": self.LEAD_SOURCES[self.rng.integers(len(self.LEAD_SOURCES))],
             "converted": converted
         }
     
-    def generate_dataset(self, size: int = 1000) -> List[Dict[str, Any]]:
+    def _generate_columns(self, size: int) -> Dict[str, np.ndarray]:
         """
-        Generate a complete synthetic dataset
+        Draw a shuffled synthetic dataset as one NumPy array per field
+        
+        All fields are drawn in bulk with NumPy instead of calling
+        generate_lead once per row.
         
         Args:
-            size: Number of leads to generate (default 1000)
+            size: Number of leads to generate
         
         Returns:
-            List of lead dictionaries
+            Column arrays keyed by DATASET_FIELDS, in that order
         """
-        leads = []
-        
         # Generate balanced dataset (40% converted, 60% not converted)
         converted_count = int(size * 0.40)
         not_converted_count = size - converted_count
         
-        # Generate converted leads
-        for i in range(converted_count):
-            lead = self.generate_lead(
-                lead_id=f"LEAD-CONV-{i+1:04d}",
-                converted=True
-            )
-            leads.append(lead)
-        
-        # Generate non-converted leads
-        for i in range(not_converted_count):
-            lead = self.generate_lead(
-                lead_id=f"LEAD-NCON-{i+1:04d}",
-                converted=False
-            )
-            leads.append(lead)
+        lead_ids = np.array(
+            [f"LEAD-CONV-{i+1:04d}" for i in range(converted_count)] +
+            [f"LEAD-NCON-{i+1:04d}" for i in range(not_converted_count)]
+        )
+        converted = np.zeros(size, dtype=bool)
+        converted[:converted_count] = True
+        
+        # Look up each lead's engagement ranges by outcome and draw all
+        # metrics in a single call (converted leads engage more)
+        outcome = converted.astype(np.intp)
+        engagement = self.rng.integers(
+            self._ENGAGEMENT_RANGES[outcome, ::2],
+            self._ENGAGEMENT_RANGES[outcome, 1::2],
+            endpoint=True
+        )
+        
+        columns = {
+            "lead_id": lead_ids,
+            "age": self.rng.integers(22, 66, size=size),
+            "location": self.rng.choice(_LOCATIONS_ARR, size=size),
+            "industry": self.rng.choice(_INDUSTRIES_ARR, size=size),
+            **dict(zip(self.ENGAGEMENT_FIELDS, engagement.T)),
+            "lead_source": self.rng.choice(_LEAD_SOURCES_ARR, size=size),
+            "converted": converted
+        }
         
         # Shuffle to mix converted and non-converted
-        random.shuffle(leads)
+        order = self.rng.permutation(size)
+        
+        return {name: values[order] for name, values in columns.items()}
+    
+    def generate_dataset_df(self, size: int = 1000) -> pd.DataFrame:
+        """
+        Generate a complete synthetic dataset as a DataFrame
+        
+        The columns are handed to pandas without going through per-row
+        dictionaries.
+        
+        Args:
+            size: Number of leads to generate (default 1000)
+        
+        Returns:
+            DataFrame with one row per lead
+        """
+        return pd.DataFrame(self._generate_columns(size))
+    
+    def iter_dataset(self, size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Generate a complete synthetic dataset one lead dictionary at a time
+        
+        Rows are built as they are consumed rather than collected into a
+        list first (generate_dataset collects them).
+        
+        Args:
+            size: Number of leads to generate (default 1000)
+        
+        Yields:
+            Lead dictionaries with plain Python values
+        """
+        columns = self._generate_columns(size)
+        for values in zip(*(column.tolist() for column in columns.values())):
+            yield dict(zip(self.DATASET_FIELDS, values))
+    
+    def generate_dataset(self, size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Generate a complete synthetic dataset
+        
+        Args:
+            size: Number of leads to generate (default 1000)
         
-        return leads
+        Returns:
+            List of lead dictionaries
+        """
+        # Straight from the column arrays; a DataFrame round trip via
+        # to_dict('records') costs ~5x more for the same dictionaries
+        return list(self.iter_dataset(size))
     
-    def save_to_csv(self, leads: List[Dict[str, Any]], filename: str = "synthetic_leads.csv") -> None:
+    def save_to_csv(
+        self,
+        leads: Union[pd.DataFrame, Iterable[Dict[str, Any]]],
+        filename: str = "synthetic_leads.csv"
+    ) -> int:
         """
         Save generated leads to CSV file
         
+        Lead dictionaries (e.g. from iter_dataset) are written row by row
+        as they are produced.
+        
         Args:
-            leads: List of lead dictionaries
+            leads: DataFrame, or any iterable of lead dictionaries
             filename: Output CSV filename
-        """
-        import csv
         
-        if not leads:
-            return
+        Returns:
+            Number of leads written
+        """
+        if isinstance(leads, pd.DataFrame):
+            leads.to_csv(filename, index=False)
+            return len(leads)
         
-        with open(filename, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=leads[0].keys())
+        written = 0
+        with open(filename, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.DATASET_FIELDS, lineterminator="\n")
             writer.writeheader()
-            writer.writerows(leads)
+            for lead in leads:
+                writer.writerow(lead)
+                written += 1
+        return written
     
     @staticmethod
-    def get_feature_names() -> List[str]:
-        """Return list of feature names for ML pipeline"""
-        return [
+    @lru_cache(maxsize=1)
+    def get_feature_names() -> Tuple[str, ...]:
+        """Return feature names for ML pipeline (cached, hence a tuple)"""
+        return (
             "age", "location", "industry", "email_opens",
             "website_visits", "content_downloads", "days_since_contact",
             "lead_source"
-        ]
+        )
     
     @staticmethod
     def get_categorical_features() -> List[str]:
@@ -181,17 +262,23 @@ class SyntheticDataGenerator:
         ]
 
 
+# Category arrays for the vectorized generate_dataset_df path (built once at import)
+_LOCATIONS_ARR = np.asarray(SyntheticDataGenerator.LOCATIONS)
+_INDUSTRIES_ARR = np.asarray(SyntheticDataGenerator.INDUSTRIES)
+_LEAD_SOURCES_ARR = np.asarray(SyntheticDataGenerator.LEAD_SOURCES)
+
+
 def main():
     """Generate and save synthetic dataset"""
     print("Generating synthetic lead dataset...")
     generator = SyntheticDataGenerator(seed=42)
-    leads = generator.generate_dataset(size=1000)
+    leads = generator.generate_dataset_df(size=1000)
     
     # Save to CSV
     generator.save_to_csv(leads, "data/synthetic_leads.csv")
     
     # Print statistics
-    converted = sum(1 for lead in leads if lead["converted"])
+    converted = int(leads["converted"].sum())
     print(f"✓ Generated {len(leads)} leads")
     print(f"✓ Converted: {converted} ({converted/len(leads)*100:.1f}%)")
     print(f"✓ Not Converted: {len(leads)-converted} ({(len(leads)-converted)/len(leads)*100:.1f}%)")
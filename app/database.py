@@ -3,46 +3,161 @@ Lead Scoring Agent - Database Layer
 SQLite schema and operations for persistence
 """
 
+import io
 import sqlite3
 import pickle
-from datetime import datetime
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from contextlib import contextmanager
 
-from app.config import settings
+import numpy as np
+
+from app.config import get_settings
+from app.time_cache import utc_timestamp
+
+
+# Journal mode is stored in the database file, so it is set once per Database
+# (on its first connection) rather than on every connection. WAL lets readers
+# run alongside the single writer thread.
+JOURNAL_MODE = "WAL"
+
+# Stored in PRAGMA user_version once initialize_schema has run; bump it when
+# the DDL below changes so existing databases pick up the new objects
+SCHEMA_VERSION = 1
+
+# Applied to every connection as it is opened (all of these are per-connection).
+# Every threadpool thread holds its own connection, so the page cache stays
+# small here; mmap'd pages live in the shared OS page cache, not per connection.
+SQLITE_PRAGMAS = (
+    "synchronous=NORMAL",      # fsync at checkpoints only, safe under WAL
+    "temp_store=MEMORY",
+    "cache_size=-2000",        # ~2 MB page cache (SQLite's default)
+    "mmap_size=268435456"      # 256 MB memory-mapped reads
+)
+
+# Extra settings for the one long-lived write-worker connection
+WRITER_PRAGMAS = (
+    "cache_size=-64000",       # ~64 MB page cache for batched inserts
+)
+
+# Compression applied to model blobs written by save_model
+MODEL_BLOB_COMPRESSION = ("zlib", 3)
+
+
+def _dump_model_blob(model_obj: Any) -> bytes:
+    """Serialize a model package with joblib and compress it"""
+    import joblib
+    
+    buffer = io.BytesIO()
+    joblib.dump(model_obj, buffer, compress=MODEL_BLOB_COMPRESSION)
+    return buffer.getvalue()
+
+
+def _load_model_blob(blob: bytes) -> Any:
+    """Deserialize a model blob (joblib, or plain pickle from older rows)"""
+    if blob[:1] == b"\x80":
+        # Uncompressed pickle stream written before the switch to joblib
+        return pickle.loads(blob)
+    
+    import joblib
+    return joblib.load(io.BytesIO(blob))
 
 
 class Database:
     """SQLite database manager for lead scoring agent"""
     
     def __init__(self, db_path: Optional[str] = None):
-        self.db_path = db_path or settings.database_path
+        self.db_path = db_path or get_settings().database_path
+        self._local = threading.local()
+        self._journal_mode_set = False
+        self._journal_mode_lock = threading.Lock()
+        self._schema_ready = False
         self._ensure_database_exists()
     
     def _ensure_database_exists(self) -> None:
         """Create database directory if it doesn't exist"""
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection configured with SQLITE_PRAGMAS"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        conn.row_factory = sqlite3.Row
+        
+        if not self._journal_mode_set:
+            with self._journal_mode_lock:
+                if not self._journal_mode_set:
+                    conn.execute(f"PRAGMA journal_mode={JOURNAL_MODE}")
+                    self._journal_mode_set = True
+        
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+        return conn
+    
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """
+        Context manager for database connections
+        
+        Each thread keeps one persistent connection; the block runs inside
+        a single transaction (nested blocks join the outer one).
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        
+        if conn.in_transaction:
+            yield conn
+            return
+        
+        conn.execute("BEGIN")
         try:
             yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
+            conn.execute("COMMIT")
         finally:
+            # Covers exceptions and BaseExceptions alike (GeneratorExit from an
+            # abandoned iter_feedback_chunks, KeyboardInterrupt): never leave
+            # the persistent connection inside an open transaction
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+    
+    def configure_writer(self) -> None:
+        """Apply WRITER_PRAGMAS to the calling thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        
+        for pragma in WRITER_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+    
+    def close(self) -> None:
+        """Close the calling thread's connection, if one is open"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
             conn.close()
+            self._local.conn = None
     
     def initialize_schema(self) -> None:
-        """Create all database tables if they don't exist"""
+        """
+        Create all database tables if they don't exist
+        
+        Skipped when this instance already ran it, or when the file's
+        user_version shows it is at SCHEMA_VERSION.
+        """
+        if self._schema_ready:
+            return
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            if cursor.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+                self._schema_ready = True
+                return
+            
             # Table 1: lead_scores - Primary storage for leads and scores
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS lead_scores (
@@ -81,6 +196,18 @@ class Database:
                 ON lead_scores(actual_outcome)
             """)
             
+            # Partial covering index for feedback/training queries: only
+            # labelled rows are indexed and every selected column is included
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_feedback_covering
+                ON lead_scores(
+                    actual_outcome, lead_id, age, location, industry,
+                    email_opens, website_visits, content_downloads,
+                    days_since_contact, lead_source
+                )
+                WHERE actual_outcome IS NOT NULL
+            """)
+            
             # Table 2: models - Model version management
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS models (
@@ -96,6 +223,13 @@ class Database:
                 )
             """)
             
+            # Partial index so active-model lookups skip inactive history
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_models_active
+                ON models(training_timestamp DESC)
+                WHERE active = 1
+            """)
+            
             # Table 3: system_metrics - Aggregate statistics
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS system_metrics (
@@ -108,7 +242,7 @@ class Database:
             # Initialize system metrics if empty
             cursor.execute("SELECT COUNT(*) as count FROM system_metrics")
             if cursor.fetchone()["count"] == 0:
-                now = datetime.utcnow().isoformat()
+                now = utc_timestamp()
                 metrics = [
                     ("total_scores", "0", now),
                     ("feedback_count", "0", now),
@@ -118,36 +252,92 @@ class Database:
                     "INSERT INTO system_metrics (metric_key, metric_value, last_updated) VALUES (?, ?, ?)",
                     metrics
                 )
+            
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        
+        self._schema_ready = True
+    
+    # Schema introspection, kept as constants so the connection's statement
+    # cache reuses the compiled statements
+    _LIST_TABLES_SQL = "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+    _LIST_INDEXES_SQL = "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL ORDER BY name"
+    
+    def list_tables(self) -> List[str]:
+        """Names of all tables in the database"""
+        with self.get_connection() as conn:
+            return [row["name"] for row in conn.execute(self._LIST_TABLES_SQL)]
+    
+    def list_indexes(self) -> List[str]:
+        """Names of all explicitly created indexes (automatic ones excluded)"""
+        with self.get_connection() as conn:
+            return [row["name"] for row in conn.execute(self._LIST_INDEXES_SQL)]
+    
+    _INSERT_LEAD_SCORE_SQL = """
+        INSERT OR REPLACE INTO lead_scores (
+            lead_id, age, location, industry, email_opens, 
+            website_visits, content_downloads, days_since_contact,
+            lead_source, conversion_score, risk_category, 
+            actual_outcome, model_version, timestamp
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    @staticmethod
+    def _lead_score_row(lead_data: Dict[str, Any], timestamp: Optional[str] = None) -> tuple:
+        """
+        Order a lead score record's values for _INSERT_LEAD_SCORE_SQL
+        
+        `timestamp` fills in for records that don't carry their own.
+        """
+        return (
+            lead_data["lead_id"],
+            lead_data["age"],
+            lead_data["location"],
+            lead_data["industry"],
+            lead_data["email_opens"],
+            lead_data["website_visits"],
+            lead_data["content_downloads"],
+            lead_data["days_since_contact"],
+            lead_data["lead_source"],
+            lead_data["conversion_score"],
+            lead_data["risk_category"],
+            lead_data.get("actual_outcome"),
+            lead_data["model_version"],
+            lead_data.get("timestamp", timestamp)
+        )
     
     def insert_lead_score(self, lead_data: Dict[str, Any]) -> int:
         """Insert or update a lead score record (upsert on lead_id)"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO lead_scores (
-                    lead_id, age, location, industry, email_opens, 
-                    website_visits, content_downloads, days_since_contact,
-                    lead_source, conversion_score, risk_category, 
-                    actual_outcome, model_version, timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                lead_data["lead_id"],
-                lead_data["age"],
-                lead_data["location"],
-                lead_data["industry"],
-                lead_data["email_opens"],
-                lead_data["website_visits"],
-                lead_data["content_downloads"],
-                lead_data["days_since_contact"],
-                lead_data["lead_source"],
-                lead_data["conversion_score"],
-                lead_data["risk_category"],
-                lead_data.get("actual_outcome"),
-                lead_data["model_version"],
-                lead_data["timestamp"]
-            ))
+            cursor.execute(
+                self._INSERT_LEAD_SCORE_SQL, self._lead_score_row(lead_data, utc_timestamp())
+            )
             return cursor.lastrowid
     
+    def insert_lead_scores(
+        self, leads: List[Dict[str, Any]], chunk_size: int = 10_000
+    ) -> None:
+        """
+        Bulk insert or update lead score records in a single transaction
+        
+        Args:
+            leads: Lead score records (same shape as insert_lead_score)
+            chunk_size: Rows bound per executemany call
+        """
+        # One timestamp for the whole batch
+        timestamp = utc_timestamp()
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(leads), chunk_size):
+                cursor.executemany(
+                    self._INSERT_LEAD_SCORE_SQL,
+                    [
+                        self._lead_score_row(lead, timestamp)
+                        for lead in leads[start:start + chunk_size]
+                    ]
+                )
+    
     def update_lead_outcome(self, lead_id: str, actual_outcome: bool) -> bool:
         """Update actual conversion outcome for a lead"""
         with self.get_connection() as conn:
@@ -159,6 +349,25 @@ class Database:
             """, (1 if actual_outcome else 0, lead_id))
             return cursor.rowcount > 0
     
+    def update_lead_outcomes(self, outcomes: List[Tuple[str, bool]]) -> int:
+        """
+        Update actual conversion outcomes for many leads in one transaction
+        
+        Args:
+            outcomes: (lead_id, actual_outcome) pairs
+        
+        Returns:
+            Number of lead rows updated
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                UPDATE lead_scores 
+                SET actual_outcome = ? 
+                WHERE lead_id = ?
+            """, [(1 if outcome else 0, lead_id) for lead_id, outcome in outcomes])
+            return cursor.rowcount
+    
     def get_feedback_count(self) -> int:
         """Get count of leads with actual outcomes"""
         with self.get_connection() as conn:
@@ -187,10 +396,61 @@ class Database:
         """Retrieve all leads with actual outcomes (alias for get_training_data)"""
         return self.get_training_data()
     
+    # Column dtypes for iter_feedback_chunks, in SELECT order
+    _FEEDBACK_COLUMN_DTYPES = {
+        "age": np.int32,
+        "email_opens": np.int32,
+        "website_visits": np.int32,
+        "content_downloads": np.int32,
+        "days_since_contact": np.int32,
+        "location": object,
+        "industry": object,
+        "lead_source": object,
+        "actual_outcome": np.int8
+    }
+    
+    _FEEDBACK_SQL = f"""
+        SELECT {", ".join(_FEEDBACK_COLUMN_DTYPES)}
+        FROM lead_scores
+        WHERE actual_outcome IS NOT NULL
+    """
+    
+    @classmethod
+    def _feedback_columns(cls, rows: List[tuple]) -> Dict[str, np.ndarray]:
+        """Transpose feedback row tuples into one typed array per column"""
+        columns = list(zip(*rows)) if rows else [()] * len(cls._FEEDBACK_COLUMN_DTYPES)
+        
+        return {
+            name: np.array(values, dtype=dtype)
+            for (name, dtype), values in zip(cls._FEEDBACK_COLUMN_DTYPES.items(), columns)
+        }
+    
+    def iter_feedback_chunks(self, chunk_size: int = 4096) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Stream leads with actual outcomes in columnar chunks
+        
+        Rows are fetched as plain tuples and transposed into one typed array
+        per column (served from idx_feedback_covering), with fetchmany so
+        only one chunk of rows is materialized at a time. The whole scan runs
+        in one read transaction (a consistent snapshot under WAL).
+        
+        Args:
+            chunk_size: Rows per chunk
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(self._FEEDBACK_SQL)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield self._feedback_columns(rows)
+    
     def save_model(self, version: str, model_obj: Any, metrics: Dict[str, Any]) -> None:
         """Save a trained model to database"""
-        model_blob = pickle.dumps(model_obj)
-        timestamp = datetime.utcnow().isoformat()
+        model_blob = _dump_model_blob(model_obj)
+        timestamp = utc_timestamp()
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
@@ -223,19 +483,37 @@ class Database:
             """)
             row = cursor.fetchone()
             if row:
-                model_obj = pickle.loads(row["model_blob"])
+                model_obj = _load_model_blob(row["model_blob"])
                 return (model_obj, dict(row))
             return None
     
+    def get_active_model_version(self) -> Optional[str]:
+        """Get the active model's version (without loading its blob)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT version FROM models
+                WHERE active = 1
+                ORDER BY training_timestamp DESC
+                LIMIT 1
+            """)
+            row = cursor.fetchone()
+            return row["version"] if row else None
+    
+    def has_active_model(self) -> bool:
+        """Check whether an active model exists (without loading its blob)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM models WHERE active = 1 LIMIT 1")
+            return cursor.fetchone() is not None
+    
     def set_active_model(self, version: str) -> None:
         """Mark a model version as active (deactivates others)"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            # Deactivate all models
-            cursor.execute("UPDATE models SET active = 0")
-            # Activate specified version
+            # Activate specified version and deactivate the rest in one pass
             cursor.execute(
-                "UPDATE models SET active = 1 WHERE version = ?",
+                "UPDATE models SET active = CASE WHEN version = ? THEN 1 ELSE 0 END",
                 (version,)
             )
     
@@ -254,7 +532,7 @@ class Database:
     
     def update_system_metric(self, key: str, value: str) -> None:
         """Update a system metric value"""
-        timestamp = datetime.utcnow().isoformat()
+        timestamp = utc_timestamp()
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
@@ -269,20 +547,40 @@ class Database:
             cursor.execute("SELECT metric_key, metric_value FROM system_metrics")
             return {row["metric_key"]: row["metric_value"] for row in cursor.fetchall()}
     
+    _MODEL_INFO_SQL = """
+        SELECT version, auc_score, precision_top20, recall_top20,
+               training_samples, training_timestamp
+        FROM models
+        WHERE active = 1
+        ORDER BY training_timestamp DESC
+        LIMIT 1
+    """
+    
     def get_model_info(self) -> Optional[Dict[str, Any]]:
         """Get information about the active model"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT version, auc_score, precision_top20, recall_top20,
-                       training_samples, training_timestamp
-                FROM models
-                WHERE active = 1
-                ORDER BY training_timestamp DESC
-                LIMIT 1
-            """)
+            cursor.execute(self._MODEL_INFO_SQL)
             row = cursor.fetchone()
             return dict(row) if row else None
+    
+    def get_info_bundle(self) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Get system metrics and active model info together (for /info)
+        
+        Both reads share one connection checkout and one transaction.
+        
+        Returns:
+            Tuple of (system_metrics, model_info or None)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT metric_key, metric_value FROM system_metrics")
+            metrics = {row["metric_key"]: row["metric_value"] for row in cursor.fetchall()}
+            
+            cursor.execute(self._MODEL_INFO_SQL)
+            row = cursor.fetchone()
+            return metrics, (dict(row) if row else None)
 
 
 # Global database instance
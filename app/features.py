@@ -5,10 +5,12 @@ Transform raw lead data into ML-ready features
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Union
+from scipy import sparse
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
-import pickle
+
+from app.schemas import LEAD_SOURCE_TO_CODE
 
 
 class FeatureEngineer:
@@ -18,6 +20,13 @@ class FeatureEngineer:
         self.preprocessor = None
         self.feature_names = None
         self._is_fitted = False
+        
+        # Fitted arrays for the single-lead fast path (see transform_single)
+        self._num_mean = None
+        self._num_scale = None
+        self._cat_lookup = None
+        self._lead_source_columns = None
+        self._n_features = None
     
     @staticmethod
     def get_numeric_features() -> List[str]:
@@ -36,7 +45,16 @@ class FeatureEngineer:
         return ['location', 'industry', 'lead_source']
     
     @staticmethod
-    def engineer_derived_features(df: pd.DataFrame) -> pd.DataFrame:
+    def get_derived_features() -> List[str]:
+        """Return list of derived feature names"""
+        return [
+            'engagement_intensity',
+            'recency_weight',
+            'interaction_frequency'
+        ]
+    
+    @staticmethod
+    def engineer_derived_features(df: pd.DataFrame, *, copy: bool = True) -> pd.DataFrame:
         """
         Create derived features from raw data
         
@@ -44,26 +62,34 @@ class FeatureEngineer:
         - engagement_intensity: total engagement score
         - recency_weight: inverse of days since contact (recent = higher)
         - interaction_frequency: average interactions per metric
+        
+        Pass copy=False when the caller owns `df`; the derived columns are
+        then added to it in place.
         """
-        df = df.copy()
+        if copy:
+            df = df.copy()
+        
+        # Pull the engagement columns out once as a float32 block
+        engagement = df[
+            ['email_opens', 'website_visits', 'content_downloads', 'days_since_contact']
+        ].to_numpy(dtype=np.float32)
+        email_opens, website_visits, content_downloads, days_since_contact = engagement.T
         
         # Engagement intensity (weighted sum of interactions)
         df['engagement_intensity'] = (
-            df['email_opens'] * 0.3 +
-            df['website_visits'] * 0.4 +
-            df['content_downloads'] * 0.3
+            email_opens * 0.3 +
+            website_visits * 0.4 +
+            content_downloads * 0.3
         )
         
         # Recency weight (more recent = higher weight)
         # Use exponential decay: e^(-days/30)
-        df['recency_weight'] = np.exp(-df['days_since_contact'] / 30)
+        df['recency_weight'] = np.exp(days_since_contact * np.float32(-1.0 / 30.0))
         
         # Interaction frequency (average per action type)
         df['interaction_frequency'] = (
-            df['email_opens'] + 
-            df['website_visits'] + 
-            df['content_downloads']
-        ) / 3.0
+            email_opens + website_visits + content_downloads
+        ) * np.float32(1.0 / 3.0)
         
         return df
     
@@ -71,28 +97,30 @@ class FeatureEngineer:
         """
         Create sklearn ColumnTransformer for feature preprocessing
         
-        Numeric features: StandardScaler (z-score normalization)
+        Numeric features: StandardScaler (unit variance, no centering)
         Categorical features: OneHotEncoder (binary encoding)
+        
+        The output is a scipy.sparse CSR matrix; numeric columns are not
+        mean-centered so that the one-hot block can stay sparse. Downstream
+        estimators must accept sparse input (LogisticRegression does).
         """
         numeric_features = self.get_numeric_features()
         
         # Add derived features to numeric list
-        derived_features = [
-            'engagement_intensity',
-            'recency_weight',
-            'interaction_frequency'
-        ]
+        derived_features = self.get_derived_features()
         
         all_numeric = numeric_features + derived_features
         categorical_features = self.get_categorical_features()
         
         preprocessor = ColumnTransformer(
             transformers=[
-                ('num', StandardScaler(), all_numeric),
-                ('cat', OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore'), 
+                ('num', StandardScaler(with_mean=False), all_numeric),
+                ('cat', OneHotEncoder(drop='first', sparse_output=True, handle_unknown='ignore',
+                                      dtype=np.float32),
                  categorical_features)
             ],
-            remainder='drop'
+            remainder='drop',
+            sparse_threshold=1.0
         )
         
         return preprocessor
@@ -109,34 +137,42 @@ class FeatureEngineer:
         """
         # Engineer derived features
         X_engineered = self.engineer_derived_features(X)
+        self._fit_engineered(X_engineered)
         
+        return self
+    
+    def _fit_engineered(self, X_engineered: pd.DataFrame) -> None:
+        """Fit the preprocessor on a frame that already has derived features"""
         # Create and fit preprocessor
         self.preprocessor = self.create_preprocessor()
         self.preprocessor.fit(X_engineered)
         
         # Store feature names after transformation
         self._extract_feature_names()
+        self._cache_fitted_arrays()
         self._is_fitted = True
-        
-        return self
     
-    def transform(self, X: pd.DataFrame) -> np.ndarray:
+    def transform(self, X: pd.DataFrame, copy: bool = True) -> np.ndarray:
         """
         Transform raw features into ML-ready features
         
         Args:
             X: DataFrame with raw features
+            copy: Set to False when X is a scratch frame owned by the caller
+                (e.g. from prepare_lead_data) to skip the defensive copy
         
         Returns:
-            numpy array of transformed features
+            Sparse CSR matrix of transformed features
         """
         if not self._is_fitted:
             raise ValueError("FeatureEngineer must be fitted before transform")
         
         # Engineer derived features
-        X_engineered = self.engineer_derived_features(X)
+        X_engineered = self.engineer_derived_features(X, copy=copy)
         
-        # Apply preprocessing
+        # Apply preprocessing (instances restored by load() have no preprocessor)
+        if self.preprocessor is None:
+            return self._transform_from_arrays(X_engineered)
         X_transformed = self.preprocessor.transform(X_engineered)
         
         return X_transformed
@@ -149,9 +185,13 @@ class FeatureEngineer:
             X: DataFrame with raw features
         
         Returns:
-            numpy array of transformed features
+            Sparse CSR matrix of transformed features
         """
-        return self.fit(X).transform(X)
+        # Engineer derived features once for both steps
+        X_engineered = self.engineer_derived_features(X)
+        self._fit_engineered(X_engineered)
+        
+        return self.preprocessor.transform(X_engineered)
     
     def _extract_feature_names(self) -> None:
         """Extract feature names after transformation"""
@@ -159,11 +199,7 @@ class FeatureEngineer:
         
         # Numeric features (original + derived)
         numeric_features = self.get_numeric_features()
-        derived_features = [
-            'engagement_intensity',
-            'recency_weight',
-            'interaction_frequency'
-        ]
+        derived_features = self.get_derived_features()
         feature_names.extend(numeric_features + derived_features)
         
         # Categorical features (one-hot encoded)
@@ -174,6 +210,148 @@ class FeatureEngineer:
         
         self.feature_names = feature_names
     
+    def _cache_fitted_arrays(self) -> None:
+        """Cache scaler statistics and one-hot column positions from the fitted preprocessor"""
+        scaler = self.preprocessor.named_transformers_['num']
+        cat_encoder = self.preprocessor.named_transformers_['cat']
+        
+        self._num_scale = scaler.scale_.astype(np.float32)
+        if scaler.with_mean:
+            self._num_mean = scaler.mean_.astype(np.float32)
+        else:
+            self._num_mean = np.zeros_like(self._num_scale)
+        
+        # Map each kept category to its output column (dropped categories encode as all zeros)
+        offset = len(self._num_mean)
+        cat_lookup = []
+        for i, categories in enumerate(cat_encoder.categories_):
+            if cat_encoder.drop_idx_ is not None and cat_encoder.drop_idx_[i] is not None:
+                categories = np.delete(categories, cat_encoder.drop_idx_[i])
+            cat_lookup.append({cat: offset + j for j, cat in enumerate(categories)})
+            offset += len(categories)
+        
+        self._cat_lookup = cat_lookup
+        self._n_features = offset
+        self._lead_source_columns = self._build_lead_source_columns()
+    
+    def _build_lead_source_columns(self) -> np.ndarray:
+        """Output column for each LEAD_SOURCE_TO_CODE code (-1 when dropped or unseen)"""
+        lookup = self._cat_lookup[self.get_categorical_features().index('lead_source')]
+        columns = np.full(len(LEAD_SOURCE_TO_CODE), -1, dtype=np.intp)
+        for source, code in LEAD_SOURCE_TO_CODE.items():
+            columns[code] = lookup.get(source, -1)
+        return columns
+    
+    def transform_single(self, lead: Dict[str, Any]) -> np.ndarray:
+        """
+        Transform a single lead without going through pandas
+        
+        Produces the same features as prepare_lead_data + transform, computed
+        directly from the arrays cached at fit time.
+        
+        Args:
+            lead: Dictionary with lead data
+        
+        Returns:
+            float32 array of shape (1, n_features)
+        """
+        if not self._is_fitted:
+            raise ValueError("FeatureEngineer must be fitted before transform")
+        if getattr(self, '_cat_lookup', None) is None:
+            # Instances pickled before the cache existed
+            self._cache_fitted_arrays()
+        
+        email_opens = float(lead['email_opens'])
+        website_visits = float(lead['website_visits'])
+        content_downloads = float(lead['content_downloads'])
+        days_since_contact = float(lead['days_since_contact'])
+        
+        numeric = np.array([
+            lead['age'],
+            email_opens,
+            website_visits,
+            content_downloads,
+            days_since_contact,
+            email_opens * 0.3 + website_visits * 0.4 + content_downloads * 0.3,
+            np.exp(-days_since_contact / 30),
+            (email_opens + website_visits + content_downloads) / 3.0
+        ], dtype=np.float32)
+        
+        out = np.zeros((1, self._n_features), dtype=np.float32)
+        out[0, :len(numeric)] = (numeric - self._num_mean) / self._num_scale
+        
+        # Unknown categories are ignored, matching handle_unknown='ignore'
+        for feature, lookup in zip(self.get_categorical_features(), self._cat_lookup):
+            column = lookup.get(lead[feature])
+            if column is not None:
+                out[0, column] = 1.0
+        
+        return out
+    
+    def transform_many(self, leads: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Transform a batch of leads without going through pandas
+        
+        Vectorized counterpart of transform_single for small online batches.
+        Raw values, derived features and scaling are all written in place
+        into the one preallocated output matrix.
+        
+        Args:
+            leads: List of dictionaries with lead data
+        
+        Returns:
+            float32 array of shape (len(leads), n_features)
+        """
+        if not self._is_fitted:
+            raise ValueError("FeatureEngineer must be fitted before transform")
+        if getattr(self, '_cat_lookup', None) is None:
+            self._cache_fitted_arrays()
+        
+        out = np.zeros((len(leads), self._n_features), dtype=np.float32)
+        if not leads:
+            return out
+        
+        # Scaled block: raw numeric columns followed by the derived ones
+        numeric_features = self.get_numeric_features()
+        n_raw = len(numeric_features)
+        numeric = out[:, :len(self._num_mean)]
+        numeric[:, :n_raw] = [[lead[feature] for feature in numeric_features] for lead in leads]
+        
+        email_opens, website_visits, content_downloads, days_since_contact = numeric[:, 1:n_raw].T
+        derived = numeric[:, n_raw:]
+        derived[:, 0] = (
+            email_opens * np.float32(0.3)
+            + website_visits * np.float32(0.4)
+            + content_downloads * np.float32(0.3)
+        )
+        np.exp(days_since_contact * np.float32(-1.0 / 30.0), out=derived[:, 1])
+        derived[:, 2] = (email_opens + website_visits + content_downloads) * np.float32(1.0 / 3.0)
+        
+        numeric -= self._num_mean
+        numeric /= self._num_scale
+        
+        # Leads from preprocess_node carry lead_source_code: one array lookup
+        # replaces the per-row string hashing for that column
+        codes = [lead.get('lead_source_code') for lead in leads]
+        use_codes = None not in codes
+        if use_codes:
+            if getattr(self, '_lead_source_columns', None) is None:
+                self._lead_source_columns = self._build_lead_source_columns()
+            columns = np.take(self._lead_source_columns, np.array(codes, dtype=np.intp))
+            rows = np.flatnonzero(columns >= 0)
+            out[rows, columns[rows]] = 1.0
+        
+        # Unknown categories are ignored, matching handle_unknown='ignore'
+        for feature, lookup in zip(self.get_categorical_features(), self._cat_lookup):
+            if use_codes and feature == 'lead_source':
+                continue
+            for row, lead in enumerate(leads):
+                column = lookup.get(lead[feature])
+                if column is not None:
+                    out[row, column] = 1.0
+        
+        return out
+    
     def get_feature_names(self) -> List[str]:
         """Get names of all transformed features"""
         if not self._is_fitted:
@@ -184,6 +362,8 @@ class FeatureEngineer:
         """
         Prepare a single lead for prediction
         
+        For online scoring prefer transform_single, which skips pandas.
+        
         Args:
             lead: Dictionary with lead data
         
@@ -205,32 +385,92 @@ class FeatureEngineer:
         return pd.DataFrame([data])
     
     def save(self, filepath: str) -> None:
-        """Save fitted feature engineer to disk"""
+        """
+        Save fitted feature engineer to disk
+        
+        Only the fitted arrays (scaler statistics, kept categories, feature
+        names) are written, as a compressed .npz archive.
+        """
         if not self._is_fitted:
             raise ValueError("Cannot save unfitted FeatureEngineer")
+        if getattr(self, '_cat_lookup', None) is None:
+            self._cache_fitted_arrays()
+        
+        categories = {
+            f"categories_{feature}": np.array(list(lookup), dtype=str)
+            for feature, lookup in zip(self.get_categorical_features(), self._cat_lookup)
+        }
         
         with open(filepath, 'wb') as f:
-            pickle.dump(self, f)
+            np.savez_compressed(
+                f,
+                num_mean=self._num_mean,
+                num_scale=self._num_scale,
+                feature_names=np.array(self.feature_names, dtype=str),
+                **categories
+            )
     
     @staticmethod
     def load(filepath: str) -> 'FeatureEngineer':
-        """Load fitted feature engineer from disk"""
-        with open(filepath, 'rb') as f:
-            return pickle.load(f)
+        """
+        Load fitted feature engineer from disk
+        
+        The sklearn preprocessor is not rebuilt; transform runs from the
+        restored arrays instead.
+        """
+        engineer = FeatureEngineer()
+        
+        with np.load(filepath, allow_pickle=False) as data:
+            engineer._num_mean = data['num_mean']
+            engineer._num_scale = data['num_scale']
+            engineer.feature_names = data['feature_names'].tolist()
+            
+            offset = len(engineer._num_mean)
+            cat_lookup = []
+            for feature in engineer.get_categorical_features():
+                categories = data[f"categories_{feature}"].tolist()
+                cat_lookup.append({cat: offset + j for j, cat in enumerate(categories)})
+                offset += len(categories)
+        
+        engineer._cat_lookup = cat_lookup
+        engineer._n_features = offset
+        engineer._is_fitted = True
+        
+        return engineer
+    
+    def _transform_from_arrays(self, X_engineered: pd.DataFrame) -> sparse.csr_matrix:
+        """Batch transform using only the cached fitted arrays (no preprocessor)"""
+        numeric_features = self.get_numeric_features() + self.get_derived_features()
+        numeric = X_engineered[numeric_features].to_numpy(dtype=np.float32)
+        
+        out = np.zeros((len(X_engineered), self._n_features), dtype=np.float32)
+        out[:, :numeric.shape[1]] = (numeric - self._num_mean) / self._num_scale
+        
+        # Unknown categories are ignored, matching handle_unknown='ignore'
+        for feature, lookup in zip(self.get_categorical_features(), self._cat_lookup):
+            columns = X_engineered[feature].map(lookup).to_numpy(dtype=np.float64)
+            rows = np.flatnonzero(~np.isnan(columns))
+            out[rows, columns[rows].astype(np.intp)] = 1.0
+        
+        return sparse.csr_matrix(out)
 
 
-def create_training_dataframe(leads: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, pd.Series]:
+def create_training_dataframe(
+    leads: Union[pd.DataFrame, List[Dict[str, Any]]]
+) -> Tuple[pd.DataFrame, pd.Series]:
     """
-    Convert list of lead dictionaries to DataFrame for training
+    Split lead data into features and target for training
+    
+    X is assembled directly from per-column NumPy arrays, so a list of
+    dictionaries is never run through pandas' record inference and a
+    DataFrame's columns are not copied more than once.
     
     Args:
-        leads: List of lead dictionaries with 'converted' field
+        leads: DataFrame (or list of lead dictionaries) with 'converted' field
     
     Returns:
         Tuple of (X: features DataFrame, y: target Series)
     """
-    df = pd.DataFrame(leads)
-    
     # Separate features and target
     feature_columns = [
         'age', 'location', 'industry', 'email_opens',
@@ -238,8 +478,22 @@ def create_training_dataframe(leads: List[Dict[str, Any]]) -> Tuple[pd.DataFrame
         'lead_source'
     ]
     
-    X = df[feature_columns]
-    y = df['converted'].astype(int)
+    if isinstance(leads, pd.DataFrame):
+        columns = {column: leads[column].to_numpy() for column in feature_columns}
+        target = leads['converted'].to_numpy()
+    else:
+        columns = {
+            column: np.array([lead[column] for lead in leads])
+            for column in feature_columns
+        }
+        target = np.array([lead['converted'] for lead in leads])
+    
+    # Shrink numeric columns to the smallest integer dtype that holds them
+    for column in FeatureEngineer.get_numeric_features():
+        columns[column] = pd.to_numeric(columns[column], downcast='integer')
+    
+    X = pd.DataFrame(columns, copy=False)
+    y = pd.Series(target.astype(int), name='converted')
     
     return X, y
 
@@ -253,7 +507,7 @@ def main():
     
     # Generate sample data
     generator = SyntheticDataGenerator(seed=42)
-    leads = generator.generate_dataset(size=100)
+    leads = generator.generate_dataset_df(size=100)
     
     # Create training data
     X, y = create_training_dataframe(leads)
@@ -273,12 +527,17 @@ def main():
         print(f"   ... and {len(engineer.get_feature_names()) - 10} more")
     
     # Test single lead transformation
-    test_lead = leads[0]
+    test_lead = leads.iloc[0].to_dict()
     X_single = engineer.prepare_lead_data(test_lead)
-    X_single_transformed = engineer.transform(X_single)
+    X_single_transformed = engineer.transform(X_single, copy=False)
     
     print(f"\n✓ Single lead transformation: {X_single_transformed.shape}")
     
+    # Test pandas-free single lead path
+    X_fast = engineer.transform_single(test_lead)
+    assert np.allclose(X_fast, X_single_transformed.toarray(), atol=1e-5)
+    print(f"✓ Fast single lead path matches: {X_fast.shape}")
+    
     print("\n" + "=" * 60)
     print("Feature Engineering Pipeline Test: PASSED ✅")
 
@@ -0,0 +1,63 @@
+"""
+Lead Scoring Agent - Logging Configuration
+Queue-based logging so log I/O happens off the request path
+"""
+
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config import get_settings
+
+
+LOG_FORMAT = "%(levelname)s:     %(name)s - %(message)s"
+
+# Background listener draining the log queue (None until configured)
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """
+    Route the `app` loggers through a QueueHandler
+    
+    Callers only enqueue records; a QueueListener thread formats them and
+    writes to stderr. Safe to call more than once.
+    
+    Args:
+        level: Log level name (defaults to settings.log_level)
+    """
+    global _listener, _queue_handler
+    
+    if _listener is not None:
+        return
+    
+    log_queue = queue.SimpleQueue()
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    _queue_handler = QueueHandler(log_queue)
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel((level or get_settings().log_level).upper())
+    app_logger.addHandler(_queue_handler)
+    app_logger.propagate = False
+    
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener, _queue_handler
+    
+    if _listener is None:
+        return
+    
+    _listener.stop()
+    logging.getLogger("app").removeHandler(_queue_handler)
+    logging.getLogger("app").propagate = True
+    _listener = None
+    _queue_handler = None
@@ -3,69 +3,111 @@ Lead Scoring Agent - FastAPI Application
 REST API with 3 endpoints: /score, /health, /info
 """
 
+import hashlib
+import logging
 import time
-from datetime import datetime
 from typing import Dict, Any
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
+import anyio.to_thread
+import orjson
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.config import settings
+from app import time_cache
+from app.config import get_settings
 from app.database import db
+from app.logging_config import configure_logging, shutdown_logging
+from app.write_queue import write_worker
+from app.responses import ORJSONResponse, PydanticResponse
 from app.schemas import (
     LeadScoreRequest,
     LeadScoreResponse,
     HealthResponse,
     InfoResponse,
     ErrorResponse,
-    RiskCategory,
     ModelMetrics
 )
 from app.data_generator import SyntheticDataGenerator
 from app.workflow import agent as scoring_agent
-from app.model import ModelTrainer
 from app.retraining import retraining_manager
 
-# Track application start time for uptime calculation
-START_TIME = time.time()
+logger = logging.getLogger(__name__)
 
-# Cached model instance for performance
-_cached_model = None
+# Track application start time for uptime calculation (monotonic clock)
+START_TIME = time.monotonic()
+
+# Worker threads available to sync (def) endpoints
+THREADPOOL_SIZE = 100
+
+# Model availability for /health, re-checked at most every few seconds
+MODEL_AVAILABLE_TTL_SECONDS = 5.0
+_model_available = {"value": False, "expires_at": 0.0}
+
+# Client/proxy caching for /info (revalidated through ETag)
+CACHE_CONTROL = "max-age=5, must-revalidate"
+
+# /health is never served from cache without asking; its ETag covers the
+# checks only, not uptime_seconds/timestamp
+HEALTH_CACHE_CONTROL = "no-cache"
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager - startup and shutdown events"""
     # Startup
-    print("🚀 Starting Lead Scoring Agent...")
+    configure_logging()
+    logger.info("🚀 Starting Lead Scoring Agent...")
+    
+    # Sync endpoints run in AnyIO's threadpool; raise its default limit of 40
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    
+    startup_settings = get_settings()
     
     # Ensure directories exist
-    settings.ensure_directories()
+    startup_settings.ensure_directories()
     
     # Initialize database schema
-    print("📊 Initializing database schema...")
+    logger.info("📊 Initializing database schema...")
     db.initialize_schema()
     
-    print("✓ Database schema initialized")
-    print(f"✓ Database path: {settings.database_path}")
-    print(f"✓ API running on {settings.api_host}:{settings.api_port}")
+    logger.info("✓ Database schema initialized")
+    
+    # Start the background lead score writer
+    write_worker.start()
+    logger.info(f"✓ Database path: {startup_settings.database_path}")
+    logger.info(f"✓ API running on {startup_settings.api_host}:{startup_settings.api_port}")
+    
+    # Build the OpenAPI schema now; FastAPI caches it on the app, so the
+    # first /docs or /openapi.json hit doesn't pay for route reflection
+    if app.openapi_url:
+        app.openapi()
+    
+    # Responses and error paths read a cached timestamp string
+    time_cache.start()
     
     yield
     
     # Shutdown
-    print("👋 Shutting down Lead Scoring Agent...")
+    logger.info("👋 Shutting down Lead Scoring Agent...")
+    write_worker.stop()
+    shutdown_logging()
+
 
+# The app object is built at import, so its metadata and docs routes use
+# the settings in effect then
+app_settings = get_settings()
 
 # Initialize FastAPI application
 app = FastAPI(
-    title=settings.api_title,
-    version=settings.api_version,
-    description=settings.api_description,
+    title=app_settings.api_title,
+    version=app_settings.api_version,
+    description=app_settings.api_description,
     lifespan=lifespan,
-    docs_url="/docs",
-    redoc_url="/redoc"
+    default_response_class=ORJSONResponse,
+    docs_url=None if app_settings.disable_docs else "/docs",
+    redoc_url=None if app_settings.disable_docs else "/redoc",
+    openapi_url=None if app_settings.disable_docs else "/openapi.json"
 )
 
 # Add CORS middleware
@@ -85,19 +127,30 @@ app.add_middleware(
 # HELPER FUNCTIONS
 # ============================================================================
 
-def calculate_risk_category(score: float) -> RiskCategory:
-    """
-    Categorize lead based on conversion score
-    High: score >= 0.7
-    Medium: 0.4 <= score < 0.7
-    Low: score < 0.4
-    """
-    if score >= 0.7:
-        return RiskCategory.HIGH
-    elif score >= 0.4:
-        return RiskCategory.MEDIUM
-    else:
-        return RiskCategory.LOW
+def is_model_available() -> bool:
+    """Whether an active model exists, cached for MODEL_AVAILABLE_TTL_SECONDS"""
+    now = time.monotonic()
+    if now >= _model_available["expires_at"]:
+        _model_available["value"] = db.has_active_model()
+        _model_available["expires_at"] = now + MODEL_AVAILABLE_TTL_SECONDS
+    return _model_available["value"]
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag derived from the values a response depends on"""
+    key = ":".join(str(part) for part in parts).encode("utf-8")
+    return f'W/"{hashlib.blake2b(key, digest_size=8).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches etag (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in tags
 
 
 def format_error_response(error_type: str, message: str, details: list = None) -> Dict[str, Any]:
@@ -106,7 +159,7 @@ def format_error_response(error_type: str, message: str, details: list = None) -
         "error": error_type,
         "message": message,
         "details": details,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": time_cache.iso_now()
     }
 
 
@@ -116,26 +169,28 @@ def format_error_response(error_type: str, message: str, details: list = None) -
 
 @app.post(
     "/score",
-    response_model=LeadScoreResponse,
     status_code=status.HTTP_200_OK,
     summary="Score a lead",
     description="Score a lead's conversion probability and optionally provide feedback for learning",
     responses={
-        200: {"description": "Lead scored successfully"},
+        200: {"model": LeadScoreResponse, "description": "Lead scored successfully"},
         400: {"model": ErrorResponse, "description": "Invalid input data"},
         500: {"model": ErrorResponse, "description": "Internal server error"}
     }
 )
-async def score_lead(request: LeadScoreRequest) -> LeadScoreResponse:
+def score_lead(request: LeadScoreRequest) -> PydanticResponse:
     """
     Score a lead and return conversion probability
     
     Phase 2: Uses ML model with LangGraph workflow
+    
+    Declared sync so the blocking model/SQLite work runs in the threadpool
+    instead of stalling the event loop (same for /health and /info).
     """
     try:
         # Execute LangGraph workflow (6 states: VALIDATE → PREPROCESS → SCORE → STORE → LEARN → RESPOND)
         response = scoring_agent.score_lead(request)
-        return response
+        return PydanticResponse(response)
         
     except Exception as e:
         raise HTTPException(
@@ -162,7 +217,7 @@ async def score_lead(request: LeadScoreRequest) -> LeadScoreResponse:
         503: {"model": ErrorResponse, "description": "Service unavailable"}
     }
 )
-async def health_check() -> HealthResponse:
+def health_check(request: Request) -> HealthResponse:
     """
     Perform system health check
     
@@ -170,6 +225,11 @@ async def health_check() -> HealthResponse:
     - Database connectivity
     - Model availability (Phase 2)
     - System uptime
+    
+    Healthy responses carry an ETag keyed on the checks above, so
+    conditional requests get a 304 while nothing has changed. The ETag does
+    not cover uptime_seconds or timestamp: a 304 says the status is
+    unchanged, not that those fields are current.
     """
     try:
         # Check database connectivity
@@ -180,12 +240,19 @@ async def health_check() -> HealthResponse:
         except Exception:
             pass
         
-        # Check model availability
-        model_data = ModelTrainer.load_from_database()
-        model_available = model_data is not None
+        # Check model availability (metadata only, no unpickling)
+        model_available = is_model_available()
+        
+        if database_connected and model_available:
+            etag = make_etag(database_connected, model_available)
+            if etag_matches(request, etag):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers={"ETag": etag, "Cache-Control": HEALTH_CACHE_CONTROL}
+                )
         
         # Calculate uptime
-        uptime_seconds = time.time() - START_TIME
+        uptime_seconds = time.monotonic() - START_TIME
         
         # Determine overall status
         if database_connected and model_available:
@@ -195,21 +262,25 @@ async def health_check() -> HealthResponse:
             overall_status = "degraded"
             status_code = status.HTTP_503_SERVICE_UNAVAILABLE
         
-        response = HealthResponse(
+        # Every field is computed right here, so skip validation
+        response = HealthResponse.model_construct(
             status=overall_status,
             database_connected=database_connected,
             model_available=model_available,
             uptime_seconds=round(uptime_seconds, 2),
-            timestamp=datetime.utcnow().isoformat()
+            timestamp=time_cache.iso_now()
         )
         
         if status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status_code,
                 content=response.model_dump()
             )
         
-        return response
+        return PydanticResponse(
+            response,
+            headers={"ETag": etag, "Cache-Control": HEALTH_CACHE_CONTROL}
+        )
         
     except Exception as e:
         raise HTTPException(
@@ -227,16 +298,15 @@ async def health_check() -> HealthResponse:
 
 @app.get(
     "/info",
-    response_model=InfoResponse,
     status_code=status.HTTP_200_OK,
     summary="System information",
     description="Get model performance metrics and system statistics",
     responses={
-        200: {"description": "System information retrieved successfully"},
+        200: {"model": InfoResponse, "description": "System information retrieved successfully"},
         500: {"model": ErrorResponse, "description": "Internal server error"}
     }
 )
-async def system_info() -> InfoResponse:
+def system_info(request: Request) -> PydanticResponse:
     """
     Retrieve system information and metrics
     
@@ -246,17 +316,19 @@ async def system_info() -> InfoResponse:
     - Feedback samples collected
     - Last training timestamp
     - Features used
+    
+    Responses carry an ETag; a matching If-None-Match gets a 304.
     """
     try:
-        # Get system metrics from database
-        metrics = db.get_system_metrics()
+        # Get system metrics and model info from database in one round trip
+        metrics, model_info = db.get_info_bundle()
         
-        # Get model info (placeholder for Phase 1)
-        model_info = db.get_model_info()
+        # Values below come from our own database and settings, so they are
+        # treated as pre-validated and models are built with model_construct
         
         if model_info:
             model_version = model_info["version"]
-            model_metrics = ModelMetrics(
+            model_metrics = ModelMetrics.model_construct(
                 auc_score=model_info.get("auc_score"),
                 precision_top20=model_info.get("precision_top20"),
                 recall_top20=model_info.get("recall_top20")
@@ -264,20 +336,20 @@ async def system_info() -> InfoResponse:
             last_training = model_info.get("training_timestamp", "never")
         else:
             # Phase 1 placeholder values
-            model_version = settings.model_version
-            model_metrics = ModelMetrics(
+            model_version = get_settings().model_version
+            model_metrics = ModelMetrics.model_construct(
                 auc_score=None,
                 precision_top20=None,
                 recall_top20=None
             )
             last_training = metrics.get("last_training", "never")
         
-        # Get current statistics
-        total_scores = int(metrics.get("total_scores", 0))
-        feedback_count = int(metrics.get("feedback_count", 0))
+        # Get current statistics (in-process counters, including queued writes)
+        total_scores = write_worker.total_scores()
+        feedback_count = write_worker.feedback_count()
         
-        # Get features used
-        features_used = SyntheticDataGenerator.get_feature_names()
+        # Get features used (a list, as InfoResponse declares)
+        features_used = list(SyntheticDataGenerator.get_feature_names())
         
         # Get retraining status (Phase 3)
         retraining_status = retraining_manager.get_status()
@@ -288,7 +360,16 @@ async def system_info() -> InfoResponse:
             "retraining_status": retraining_status
         }
         
-        return InfoResponse(
+        # Everything the body varies with (metrics follow the model version)
+        etag = make_etag(
+            model_version, total_scores, feedback_count, last_training,
+            *retraining_status.values()
+        )
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        return PydanticResponse(InfoResponse.model_construct(
             model_version=model_version,
             model_metrics=model_metrics,
             total_leads_scored=total_scores,
@@ -297,7 +378,7 @@ async def system_info() -> InfoResponse:
             features_used=features_used,
             system_status="operational",
             retraining_status=retraining_status  # Phase 3: Add retraining info
-        )
+        ), headers=headers)
         
     except Exception as e:
         raise HTTPException(
@@ -319,34 +400,52 @@ async def system_info() -> InfoResponse:
     summary="Manual model retraining",
     description="Manually trigger model retraining if sufficient feedback is available",
     responses={
-        200: {"description": "Retraining initiated or status returned"},
+        200: {"description": "Retraining job accepted"},
         400: {"model": ErrorResponse, "description": "Insufficient feedback"},
+        409: {"model": ErrorResponse, "description": "Retraining already in progress"},
         500: {"model": ErrorResponse, "description": "Internal server error"}
     }
 )
-async def manual_retrain() -> Dict[str, Any]:
+async def manual_retrain(background_tasks: BackgroundTasks) -> Dict[str, Any]:
     """
     Manually trigger model retraining
     
     Phase 3: Adaptive Learning
     - Checks if sufficient feedback (50+ samples)
-    - Retrains model if threshold met
+    - Retrains model in the background if threshold met
     - Deploys new model if accuracy improves by 2%+
+    
+    Returns as soon as the job is queued; progress and outcome are
+    reported by /info under retraining_status.
     """
     try:
-        result = retraining_manager.check_and_retrain()
+        if retraining_manager.job_state == 'running':
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=format_error_response(
+                    "RetrainingInProgress",
+                    "Retraining already in progress, see /info for progress"
+                )
+            )
         
-        if result['status'] == 'insufficient_feedback':
+        if not retraining_manager.has_sufficient_feedback():
+            feedback_count = write_worker.feedback_count()
+            threshold = retraining_manager.retraining_threshold
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=format_error_response(
                     "InsufficientFeedback",
-                    result['message'],
-                    details=[f"Current: {result['feedback_count']}, Required: {result['threshold']}"]
+                    f"Need {threshold - feedback_count} more feedback samples",
+                    details=[f"Current: {feedback_count}, Required: {threshold}"]
                 )
             )
         
-        return result
+        background_tasks.add_task(retraining_manager.run_retraining_job)
+        
+        return {
+            "status": "accepted",
+            "message": "Retraining started in the background, see /info for progress"
+        }
         
     except HTTPException:
         raise
@@ -364,6 +463,25 @@ async def manual_retrain() -> Dict[str, Any]:
 # ROOT ENDPOINT
 # ============================================================================
 
+# Settings are frozen, so the root payload is serialized once at import
+_ROOT_ENDPOINTS = {
+    "score": "/score",
+    "health": "/health",
+    "info": "/info",
+    "retrain": "/retrain"
+}
+if app.docs_url:
+    _ROOT_ENDPOINTS["docs"] = app.docs_url
+
+_ROOT_PAYLOAD = orjson.dumps({
+    "name": app_settings.api_title,
+    "version": app_settings.api_version,
+    "description": app_settings.api_description,
+    "endpoints": _ROOT_ENDPOINTS,
+    "status": "operational"
+})
+
+
 @app.get(
     "/",
     summary="Root endpoint",
@@ -371,19 +489,7 @@ async def manual_retrain() -> Dict[str, Any]:
 )
 async def root():
     """Root endpoint with API information"""
-    return {
-        "name": settings.api_title,
-        "version": settings.api_version,
-        "description": settings.api_description,
-        "endpoints": {
-            "score": "/score",
-            "health": "/health",
-            "info": "/info",
-            "retrain": "/retrain",
-            "docs": "/docs"
-        },
-        "status": "operational"
-    }
+    return Response(content=_ROOT_PAYLOAD, media_type="application/json")
 
 
 # ============================================================================
@@ -393,12 +499,12 @@ async def root():
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Handle HTTP exceptions with standardized format"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content=exc.detail if isinstance(exc.detail, dict) else {
             "error": "HTTPException",
             "message": str(exc.detail),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": time_cache.iso_now()
         }
     )
 
@@ -406,7 +512,7 @@ async def http_exception_handler(request, exc):
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Handle unexpected exceptions"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content=format_error_response(
             "InternalServerError",
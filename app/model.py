@@ -15,13 +15,25 @@ from sklearn.metrics import (
     classification_report,
     roc_curve
 )
+import logging
 import pickle
-from datetime import datetime
+import sys
+import threading
 
 from app.features import FeatureEngineer, create_training_dataframe
 from app.data_generator import SyntheticDataGenerator
 from app.database import db
-from app.config import settings
+from app.config import get_settings
+from app.time_cache import utc_timestamp
+from app.scoring_batcher import positive_proba
+
+
+logger = logging.getLogger(__name__)
+
+# Active model loaded by load_from_database, keyed by its version
+_cached_model: Optional[Tuple[Any, FeatureEngineer, Dict[str, Any]]] = None
+_cached_version: Optional[str] = None
+_model_cache_lock = threading.Lock()
 
 
 class ModelTrainer:
@@ -52,22 +64,22 @@ class ModelTrainer:
         Returns:
             Dictionary of evaluation metrics
         """
-        print(f"\n📊 Training model on {len(X)} samples...")
+        logger.info(f"📊 Training model on {len(X)} samples...")
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=test_size, random_state=random_state, stratify=y
         )
         
-        print(f"   Train set: {len(X_train)} samples")
-        print(f"   Test set: {len(X_test)} samples")
+        logger.info(f"   Train set: {len(X_train)} samples")
+        logger.info(f"   Test set: {len(X_test)} samples")
         
-        # Initialize feature engineer
+        # Initialize feature engineer (produces sparse CSR matrices)
         self.feature_engineer = FeatureEngineer()
         X_train_transformed = self.feature_engineer.fit_transform(X_train)
         X_test_transformed = self.feature_engineer.transform(X_test)
         
-        print(f"   Features: {X_train_transformed.shape[1]} dimensions")
+        logger.info(f"   Features: {X_train_transformed.shape[1]} dimensions")
         
         # Train Logistic Regression
         self.model = LogisticRegression(
@@ -77,7 +89,7 @@ class ModelTrainer:
         )
         
         self.model.fit(X_train_transformed, y_train)
-        print("   ✓ Model trained")
+        logger.info("   ✓ Model trained")
         
         # Predictions
         y_pred = self.model.predict(X_test_transformed)
@@ -87,7 +99,9 @@ class ModelTrainer:
         auc_score = roc_auc_score(y_test, y_pred_proba)
         
         # Precision and Recall at top 20%
-        threshold_20 = np.percentile(y_pred_proba, 80)  # Top 20%
+        # Top 20%: k-th smallest score via introselect (O(n), no full sort)
+        k = int(len(y_pred_proba) * 0.8)
+        threshold_20 = np.partition(y_pred_proba, k)[k]
         y_pred_top20 = (y_pred_proba >= threshold_20).astype(int)
         
         precision_top20 = precision_score(y_test, y_pred_top20, zero_division=0)
@@ -100,31 +114,33 @@ class ModelTrainer:
         )
         
         self.metrics = {
-            'auc_score': float(auc_score),
-            'precision_top20': float(precision_top20),
-            'recall_top20': float(recall_top20),
-            'cv_mean_auc': float(cv_scores.mean()),
-            'cv_std_auc': float(cv_scores.std()),
+            # numpy float64 values (a float subclass, so SQLite binds them
+            # as REAL and the API's orjson renderer serializes them natively)
+            'auc_score': auc_score,
+            'precision_top20': precision_top20,
+            'recall_top20': recall_top20,
+            'cv_mean_auc': cv_scores.mean(),
+            'cv_std_auc': cv_scores.std(),
             'training_samples': len(X_train),
             'test_samples': len(X_test),
             'n_features': X_train_transformed.shape[1]
         }
         
-        self.training_timestamp = datetime.utcnow().isoformat()
+        self.training_timestamp = utc_timestamp()
         
         # Print results
-        print(f"\n   📈 Model Performance:")
-        print(f"      AUC Score: {auc_score:.4f}")
-        print(f"      CV Mean AUC: {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
-        print(f"      Precision @ Top 20%: {precision_top20:.4f}")
-        print(f"      Recall @ Top 20%: {recall_top20:.4f}")
+        logger.info(f"   📈 Model Performance:")
+        logger.info(f"      AUC Score: {auc_score:.4f}")
+        logger.info(f"      CV Mean AUC: {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
+        logger.info(f"      Precision @ Top 20%: {precision_top20:.4f}")
+        logger.info(f"      Recall @ Top 20%: {recall_top20:.4f}")
         
         # Target check
-        target_auc = settings.target_auc
+        target_auc = get_settings().target_auc
         if auc_score >= target_auc:
-            print(f"      ✅ Target AUC ({target_auc}) achieved!")
+            logger.info(f"      ✅ Target AUC ({target_auc}) achieved!")
         else:
-            print(f"      ⚠️  Below target AUC ({target_auc})")
+            logger.info(f"      ⚠️  Below target AUC ({target_auc})")
         
         return self.metrics
     
@@ -154,8 +170,12 @@ class ModelTrainer:
         Returns:
             Conversion probability (0-1)
         """
-        X = self.feature_engineer.prepare_lead_data(lead)
-        return float(self.predict_proba(X)[0])
+        if self.model is None or self.feature_engineer is None:
+            raise ValueError("Model must be trained before prediction")
+        
+        # Same scoring function the /score batcher uses
+        X = self.feature_engineer.transform_single(lead)
+        return float(positive_proba(self.model, X)[0])
     
     def save_to_database(self, version: str) -> None:
         """
@@ -194,31 +214,51 @@ class ModelTrainer:
         # Update system metrics
         db.update_system_metric('last_training', self.training_timestamp)
         
-        print(f"\n   ✓ Model saved to database (version: {version})")
+        logger.info(f"   ✓ Model saved to database (version: {version})")
     
     @staticmethod
     def load_from_database() -> Optional[Tuple[Any, FeatureEngineer, Dict[str, Any]]]:
         """
         Load active model from database
         
+        The unpickled model is cached per version: each call only queries
+        the active version and reloads the blob when it has changed.
+        
         Returns:
             Tuple of (model, feature_engineer, metadata) or None
         """
-        result = db.get_active_model()
-        if result is None:
-            return None
+        global _cached_model, _cached_version
         
-        model_package, metadata = result
+        version = db.get_active_model_version()
+        if version is None:
+            return None
         
-        return (
-            model_package['model'],
-            model_package['feature_engineer'],
-            {
-                'version': metadata['version'],
-                'auc_score': metadata['auc_score'],
-                'training_timestamp': metadata['training_timestamp']
-            }
-        )
+        if version == _cached_version:
+            return _cached_model
+        
+        with _model_cache_lock:
+            # Another thread may have loaded it while we waited
+            if version == _cached_version:
+                return _cached_model
+            
+            result = db.get_active_model()
+            if result is None:
+                return None
+            
+            model_package, metadata = result
+            
+            _cached_model = (
+                model_package['model'],
+                model_package['feature_engineer'],
+                {
+                    'version': metadata['version'],
+                    'auc_score': metadata['auc_score'],
+                    'training_timestamp': metadata['training_timestamp']
+                }
+            )
+            _cached_version = metadata['version']
+            
+            return _cached_model
 
 
 def train_initial_model(save_to_db: bool = True) -> ModelTrainer:
@@ -231,19 +271,19 @@ def train_initial_model(save_to_db: bool = True) -> ModelTrainer:
     Returns:
         Trained ModelTrainer instance
     """
-    print("=" * 60)
-    print("Training Initial Lead Scoring Model")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info("Training Initial Lead Scoring Model")
+    logger.info("=" * 60)
     
     # Generate synthetic training data
-    print("\n🎲 Generating synthetic training data...")
+    logger.info("🎲 Generating synthetic training data...")
     generator = SyntheticDataGenerator(seed=42)
-    leads = generator.generate_dataset(size=1000)
-    print(f"   ✓ Generated {len(leads)} leads")
+    leads = generator.generate_dataset_df(size=1000)
+    logger.info(f"   ✓ Generated {len(leads)} leads")
     
     # Create training dataframe
     X, y = create_training_dataframe(leads)
-    print(f"   ✓ Conversion rate: {y.mean():.1%}")
+    logger.info(f"   ✓ Conversion rate: {y.mean():.1%}")
     
     # Train model
     trainer = ModelTrainer()
@@ -251,12 +291,12 @@ def train_initial_model(save_to_db: bool = True) -> ModelTrainer:
     
     # Save to database
     if save_to_db:
-        version = f"{settings.model_version}"
+        version = f"{get_settings().model_version}"
         trainer.save_to_database(version)
     
-    print("\n" + "=" * 60)
-    print("Model Training Complete! ✅")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info("Model Training Complete! ✅")
+    logger.info("=" * 60)
     
     return trainer
 
@@ -272,15 +312,15 @@ def retrain_model(feedback_data: pd.DataFrame, current_auc: float) -> Optional[M
     Returns:
         New ModelTrainer if improved, None otherwise
     """
-    print("=" * 60)
-    print("Retraining Model with Feedback")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info("Retraining Model with Feedback")
+    logger.info("=" * 60)
     
-    print(f"\n📊 Feedback samples: {len(feedback_data)}")
-    print(f"   Current AUC: {current_auc:.4f}")
+    logger.info(f"📊 Feedback samples: {len(feedback_data)}")
+    logger.info(f"   Current AUC: {current_auc:.4f}")
     
     # Prepare features and target
-    X, y = create_training_dataframe(feedback_data.to_dict('records'))
+    X, y = create_training_dataframe(feedback_data)
     
     # Train new model
     trainer = ModelTrainer()
@@ -288,21 +328,23 @@ def retrain_model(feedback_data: pd.DataFrame, current_auc: float) -> Optional[M
     
     # Check if improved
     improvement = metrics['auc_score'] - current_auc
-    improvement_threshold = settings.accuracy_improvement_threshold
+    improvement_threshold = get_settings().accuracy_improvement_threshold
     
-    print(f"\n   Improvement: {improvement:+.4f}")
-    print(f"   Threshold: {improvement_threshold:.4f}")
+    logger.info(f"   Improvement: {improvement:+.4f}")
+    logger.info(f"   Threshold: {improvement_threshold:.4f}")
     
     if improvement >= improvement_threshold:
-        print(f"   ✅ Model improved! Deploying new version...")
+        logger.info(f"   ✅ Model improved! Deploying new version...")
         return trainer
     else:
-        print(f"   ⚠️  Insufficient improvement. Keeping current model.")
+        logger.info(f"   ⚠️  Insufficient improvement. Keeping current model.")
         return None
 
 
 def main():
     """Train and test initial model"""
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    
     # Train model
     trainer = train_initial_model(save_to_db=True)
     
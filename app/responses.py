@@ -0,0 +1,50 @@
+"""
+Lead Scoring Agent - Response Classes
+orjson-backed JSON responses for the API layer
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import numpy as np
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+# numpy arrays/scalars are handled natively; naive datetimes are UTC here
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types orjson does not serialize on its own"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized with orjson instead of the stdlib encoder"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class PydanticResponse(ORJSONResponse):
+    """
+    Response that renders a Pydantic model with its compiled serializer
+    
+    Returning one from an endpoint (without response_model) skips FastAPI's
+    re-validation and jsonable_encoder pass over an already-built model.
+    The serializer writes UTF-8 bytes directly (same output as
+    model_dump_json, without the str round trip).
+    """
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return super().render(content)
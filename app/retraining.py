@@ -3,17 +3,40 @@ Lead Scoring Agent - Automatic Retraining System
 Background task for model retraining and deployment
 """
 
+import logging
+import queue
 import threading
-import time
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
+import numpy as np
 import pandas as pd
 
 from app.database import db
 from app.model import ModelTrainer, retrain_model
-from app.features import create_training_dataframe
-from app.config import settings
+from app.config import Settings, get_settings, on_settings_reload
 from app.workflow import clear_model_cache
+from app.counters import FEEDBACK_COUNT
+from app.write_queue import write_worker
+from app.time_cache import iso_now
+
+
+logger = logging.getLogger(__name__)
+
+# Settings read on every check, bound once (refreshed by reload_settings)
+RETRAIN_THRESHOLD = get_settings().retraining_threshold
+ACC_IMPROVEMENT = get_settings().accuracy_improvement_threshold
+
+# Longest wait for the write queue before reading feedback; a stuck writer
+# must not hold retrain_lock forever
+FLUSH_TIMEOUT_SECONDS = 30.0
+
+
+@on_settings_reload
+def _bind_settings(new_settings: Settings) -> None:
+    globals().update(
+        RETRAIN_THRESHOLD=new_settings.retraining_threshold,
+        ACC_IMPROVEMENT=new_settings.accuracy_improvement_threshold
+    )
 
 
 class RetrainingManager:
@@ -24,6 +47,19 @@ class RetrainingManager:
         self.last_check_time = None
         self.last_retrain_time = None
         self.retrain_lock = threading.Lock()
+        
+        # Outcome of the latest retraining job: idle, running, finished or error
+        self.job_state = 'idle'
+        self.last_result = None
+    
+    @property
+    def retraining_threshold(self) -> int:
+        """Feedback samples needed to retrain (follows reload_settings)"""
+        return RETRAIN_THRESHOLD
+    
+    def has_sufficient_feedback(self) -> bool:
+        """Whether enough feedback has been collected to retrain"""
+        return write_worker.feedback_count() >= self.retraining_threshold
     
     def check_and_retrain(self) -> Optional[dict]:
         """
@@ -32,18 +68,31 @@ class RetrainingManager:
         Returns:
             Dictionary with retraining results or None
         """
-        with self.retrain_lock:
-            if self.is_retraining:
-                return {
-                    'status': 'already_retraining',
-                    'message': 'Retraining already in progress'
-                }
+        # Non-blocking: a second caller reports the running job instead of
+        # queueing behind it for the length of a retrain
+        if not self.retrain_lock.acquire(blocking=False):
+            return {
+                'status': 'already_retraining',
+                'message': 'Retraining already in progress'
+            }
+        
+        try:
+            self.last_check_time = iso_now()
             
-            self.last_check_time = datetime.utcnow().isoformat()
+            # Check feedback count on the in-process counter
+            write_worker.start()
+            feedback_count = FEEDBACK_COUNT.value
+            threshold = RETRAIN_THRESHOLD
             
-            # Check feedback count
-            feedback_count = db.get_feedback_count()
-            threshold = settings.retraining_threshold
+            if feedback_count >= threshold:
+                # About to read feedback: make sure queued lead scores are in
+                # the database and the counter is corrected for upserts
+                if not write_worker.flush(timeout=FLUSH_TIMEOUT_SECONDS):
+                    return {
+                        'status': 'error',
+                        'message': 'Timed out waiting for queued lead scores to be written'
+                    }
+                feedback_count = FEEDBACK_COUNT.value
             
             if feedback_count < threshold:
                 return {
@@ -67,14 +116,21 @@ class RetrainingManager:
             
             # Start retraining
             self.is_retraining = True
+            self.job_state = 'running'
             try:
                 result = self._execute_retraining(
                     feedback_count, current_version, current_auc
                 )
-                self.last_retrain_time = datetime.utcnow().isoformat()
+                self.last_retrain_time = iso_now()
+                self.job_state = 'error' if result['status'] == 'error' else 'finished'
                 return result
+            except Exception:
+                self.job_state = 'error'
+                raise
             finally:
                 self.is_retraining = False
+        finally:
+            self.retrain_lock.release()
     
     def _execute_retraining(
         self, feedback_count: int, current_version: str, current_auc: float
@@ -90,30 +146,26 @@ class RetrainingManager:
         Returns:
             Dictionary with retraining results
         """
-        print(f"\n{'='*70}")
-        print(f"🔄 AUTOMATIC RETRAINING TRIGGERED")
-        print(f"{'='*70}")
-        print(f"Feedback samples: {feedback_count}")
-        print(f"Current model: {current_version} (AUC: {current_auc:.4f})")
-        print(f"Threshold: {settings.retraining_threshold}")
+        logger.info("=" * 70)
+        logger.info("🔄 AUTOMATIC RETRAINING TRIGGERED")
+        logger.info("=" * 70)
+        logger.info(f"Feedback samples: {feedback_count}")
+        logger.info(f"Current model: {current_version} (AUC: {current_auc:.4f})")
+        logger.info(f"Threshold: {RETRAIN_THRESHOLD}")
         
-        # Get all feedback data
-        feedback_leads = db.get_feedback_leads()
+        # Get all feedback data (streamed in columnar chunks)
+        feedback_df = self._prefetch_feedback(feedback_count)
         
-        if len(feedback_leads) == 0:
+        if feedback_df is None:
             return {
                 'status': 'error',
                 'message': 'No feedback data available'
             }
         
-        print(f"\nLoaded {len(feedback_leads)} feedback samples from database")
-        
-        # Convert to DataFrame for training
-        feedback_df = pd.DataFrame(feedback_leads)
+        logger.info(f"Loaded {len(feedback_df)} feedback samples from database")
         
         # Rename actual_outcome to converted for training
-        if 'actual_outcome' in feedback_df.columns:
-            feedback_df['converted'] = feedback_df['actual_outcome']
+        feedback_df['converted'] = feedback_df.pop('actual_outcome')
         
         # Retrain model
         new_trainer = retrain_model(feedback_df, current_auc)
@@ -125,18 +177,18 @@ class RetrainingManager:
                 'feedback_count': feedback_count,
                 'current_version': current_version,
                 'current_auc': current_auc,
-                'message': f'New model did not meet improvement threshold ({settings.accuracy_improvement_threshold})'
+                'message': f'New model did not meet improvement threshold ({ACC_IMPROVEMENT})'
             }
         
         # Model improved - deploy new version
         new_version = self._generate_version(current_version)
         new_auc = new_trainer.metrics['auc_score']
         
-        print(f"\n{'='*70}")
-        print(f"✅ MODEL IMPROVED - DEPLOYING NEW VERSION")
-        print(f"{'='*70}")
-        print(f"New version: {new_version}")
-        print(f"AUC improvement: {current_auc:.4f} → {new_auc:.4f} ({new_auc - current_auc:+.4f})")
+        logger.info("=" * 70)
+        logger.info("✅ MODEL IMPROVED - DEPLOYING NEW VERSION")
+        logger.info("=" * 70)
+        logger.info(f"New version: {new_version}")
+        logger.info(f"AUC improvement: {current_auc:.4f} → {new_auc:.4f} ({new_auc - current_auc:+.4f})")
         
         # Deactivate old model
         db.deactivate_all_models()
@@ -148,10 +200,10 @@ class RetrainingManager:
         clear_model_cache()
         
         # Update system metrics
-        db.update_system_metric('last_retraining', datetime.utcnow().isoformat())
+        db.update_system_metric('last_retraining', iso_now())
         db.update_system_metric('model_version', new_version)
         
-        print(f"\n✅ Deployment complete!\n")
+        logger.info("✅ Deployment complete!")
         
         return {
             'status': 'success',
@@ -161,10 +213,84 @@ class RetrainingManager:
             'new_auc': new_auc,
             'improvement': new_auc - current_auc,
             'feedback_count': feedback_count,
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': iso_now(),
             'message': f'Model upgraded from {current_version} to {new_version}'
         }
     
+    @staticmethod
+    def _prefetch_feedback(expected_rows: int, chunk_size: int = 4096) -> Optional[pd.DataFrame]:
+        """
+        Read feedback chunks on a producer thread while this one copies them
+        into preallocated column arrays
+        
+        The producer streams db.iter_feedback_chunks into a small bounded
+        queue, so the SQLite scan overlaps with the copying. Arrays are sized
+        for `expected_rows` up front and only grow if more feedback arrived
+        since it was counted.
+        
+        Args:
+            expected_rows: Feedback count to preallocate for
+            chunk_size: Rows per chunk
+        
+        Returns:
+            DataFrame of all feedback rows (None if there is no feedback)
+        """
+        chunks: queue.Queue = queue.Queue(maxsize=2)
+        # Set when the consumer stops reading (done or raised), so a producer
+        # blocked on a full queue gives up instead of holding its connection
+        stop = threading.Event()
+        
+        def _put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def _producer():
+            try:
+                for columns in db.iter_feedback_chunks(chunk_size):
+                    if not _put(columns):
+                        break
+            except Exception as e:
+                _put(e)
+            finally:
+                _put(None)
+                db.close()
+        
+        threading.Thread(target=_producer, name="feedback-prefetch", daemon=True).start()
+        
+        arrays = None
+        filled = 0
+        try:
+            while True:
+                item = chunks.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                
+                n = len(item['actual_outcome'])
+                if arrays is None:
+                    capacity = max(expected_rows, n)
+                    arrays = {name: np.empty(capacity, dtype=values.dtype) for name, values in item.items()}
+                elif filled + n > len(arrays['actual_outcome']):
+                    capacity = max(2 * len(arrays['actual_outcome']), filled + n)
+                    arrays = {name: np.resize(values, capacity) for name, values in arrays.items()}
+                
+                for name, values in item.items():
+                    arrays[name][filled:filled + n] = values
+                filled += n
+        finally:
+            stop.set()
+        
+        if not filled:
+            return None
+        
+        return pd.DataFrame({name: values[:filled] for name, values in arrays.items()}, copy=False)
+    
     def _generate_version(self, current_version: str) -> str:
         """
         Generate new version number
@@ -181,21 +307,44 @@ class RetrainingManager:
             return f"{major}.{new_minor}"
         except Exception:
             # Fallback to timestamp-based version
-            timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+            timestamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
             return f"1.{timestamp}"
     
+    def run_retraining_job(self) -> None:
+        """
+        Run check_and_retrain as a background job
+        
+        Exceptions are recorded instead of raised, since there is no
+        request left to report them to; get_status() exposes the outcome.
+        """
+        try:
+            result = self.check_and_retrain()
+        except Exception as e:
+            self.job_state = 'error'
+            result = {'status': 'error', 'message': f'Retraining failed: {str(e)}'}
+            logger.exception(f"❌ Retraining job failed: {str(e)}")
+        
+        # A job that lost the race to another one has nothing to report;
+        # keep the running job's result
+        if result is not None and result.get('status') != 'already_retraining':
+            self.last_result = result
+    
     def trigger_background_retraining(self) -> None:
         """Trigger retraining in a background thread"""
         def _background_task():
-            result = self.check_and_retrain()
+            self.run_retraining_job()
+            result = self.last_result
             if result:
                 status = result.get('status')
                 if status == 'success':
-                    print(f"✅ Background retraining completed: {result.get('new_version')}")
+                    logger.info(f"✅ Background retraining completed: {result.get('new_version')}")
                 elif status == 'no_improvement':
-                    print(f"⚠️  Background retraining: No improvement")
+                    logger.warning("⚠️  Background retraining: No improvement")
                 elif status == 'insufficient_feedback':
-                    print(f"ℹ️  Background retraining: Insufficient feedback ({result.get('feedback_count')}/{result.get('threshold')})")
+                    logger.info(f"ℹ️  Background retraining: Insufficient feedback ({result.get('feedback_count')}/{result.get('threshold')})")
+        
+        if self.job_state == 'running':
+            return
         
         thread = threading.Thread(target=_background_task, daemon=True)
         thread.start()
@@ -207,8 +356,8 @@ class RetrainingManager:
         Returns:
             Dictionary with status information
         """
-        feedback_count = db.get_feedback_count()
-        threshold = settings.retraining_threshold
+        feedback_count = FEEDBACK_COUNT.value
+        threshold = RETRAIN_THRESHOLD
         
         return {
             'is_retraining': self.is_retraining,
@@ -216,7 +365,9 @@ class RetrainingManager:
             'retraining_threshold': threshold,
             'ready_for_retraining': feedback_count >= threshold,
             'last_check_time': self.last_check_time,
-            'last_retrain_time': self.last_retrain_time
+            'last_retrain_time': self.last_retrain_time,
+            'job_state': self.job_state,
+            'last_result_status': self.last_result['status'] if self.last_result else None
         }
 
 
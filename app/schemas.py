@@ -27,6 +27,15 @@ class RiskCategory(str, Enum):
     LOW = "low"
 
 
+# Integer code per lead source (declaration order), so feature engineering can
+# index lookup arrays instead of hashing strings
+LEAD_SOURCE_TO_CODE: Dict[str, int] = {s.value: i for i, s in enumerate(LeadSource)}
+
+# Score bands: < 0.4 low, 0.4 - 0.7 medium, >= 0.7 high
+RISK_THRESHOLDS = (0.4, 0.7)
+RISK_CATS = (RiskCategory.LOW, RiskCategory.MEDIUM, RiskCategory.HIGH)
+
+
 # ============================================================================
 # REQUEST SCHEMAS
 # ============================================================================
@@ -166,7 +175,7 @@ class LeadScoreResponse(BaseModel):
                 "lead_id": "LEAD-12345",
                 "conversion_score": 0.78,
                 "risk_category": "high",
-                "timestamp": "2025-11-22T10:30:00.000000",
+                "timestamp": "2025-11-22T10:30:00+00:00",
                 "model_version": "1.0"
             }
         }
@@ -207,7 +216,7 @@ class HealthResponse(BaseModel):
                 "database_connected": True,
                 "model_available": True,
                 "uptime_seconds": 3600.5,
-                "timestamp": "2025-11-22T10:30:00.000000"
+                "timestamp": "2025-11-22T10:30:00+00:00"
             }
         }
 
@@ -291,7 +300,7 @@ class InfoResponse(BaseModel):
                 },
                 "total_leads_scored": 150,
                 "feedback_samples_collected": 25,
-                "last_training_timestamp": "2025-11-22T08:00:00.000000",
+                "last_training_timestamp": "2025-11-22T08:00:00+00:00",
                 "features_used": [
                     "age", "location", "industry", "email_opens",
                     "website_visits", "content_downloads", 
@@ -360,6 +369,6 @@ class ErrorResponse(BaseModel):
                         "message": "Age must be between 18 and 100"
                     }
                 ],
-                "timestamp": "2025-11-22T10:30:00.000000"
+                "timestamp": "2025-11-22T10:30:00+00:00"
             }
         }
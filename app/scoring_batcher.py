@@ -0,0 +1,130 @@
+"""
+Lead Scoring Agent - Micro-batched Inference
+Score concurrent requests together with one predict_proba call
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.special import expit
+from sklearn.linear_model import LogisticRegression
+
+from app.schemas import RISK_CATS, RISK_THRESHOLDS
+
+
+# Risk band edges/labels for np.digitize, built from the bands in app.schemas
+RISK_BINS = np.array(RISK_THRESHOLDS)
+RISK_LABELS = np.array([category.value for category in RISK_CATS])
+
+
+class ScoringBatcher:
+    """
+    Collects leads from concurrent requests and scores them in batches
+    
+    A single consumer thread takes the first waiting lead, gathers up to
+    `max_batch` leads (or whatever arrives within `max_wait_ms`), transforms
+    them with FeatureEngineer.transform_many and runs one predict_proba per
+    model. Risk categories are binned for the whole batch with np.digitize.
+    Each caller gets its (score, risk_category) back through a Future.
+    """
+    
+    def __init__(self, max_batch: int = 64, max_wait_ms: float = 5.0):
+        self.max_batch = max_batch
+        self.max_wait_seconds = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+    
+    def start(self) -> None:
+        """Start the consumer thread (no-op if already running; restarts a dead one)"""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                thread = threading.Thread(target=self._run, name="scoring-batcher", daemon=True)
+                thread.start()
+                self._thread = thread
+    
+    def submit(self, model_data: Tuple[Any, Any, dict], lead: Dict[str, Any]) -> Future:
+        """
+        Queue a lead for scoring
+        
+        Args:
+            model_data: (model, feature_engineer, metadata) to score with
+            lead: Preprocessed lead dictionary
+        
+        Returns:
+            Future resolving to (conversion probability, risk category value)
+        """
+        self.start()
+        
+        future: Future = Future()
+        self._queue.put((model_data, lead, future))
+        return future
+    
+    def _run(self) -> None:
+        """Consumer loop: gather a batch, score it, repeat"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_seconds
+            
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # Leads queued around a model swap are scored with their own model
+            groups: Dict[int, List[tuple]] = {}
+            for item in batch:
+                groups.setdefault(id(item[0]), []).append(item)
+            
+            for items in groups.values():
+                self._score_group(items)
+    
+    @staticmethod
+    def _score_group(items: List[tuple]) -> None:
+        """Score leads that share a model and resolve their futures"""
+        model, feature_engineer, _ = items[0][0]
+        
+        try:
+            X = feature_engineer.transform_many([lead for _, lead, _ in items])
+            proba = positive_proba(model, X)
+            risks = RISK_LABELS[np.digitize(proba, RISK_BINS)].tolist()
+        except Exception as e:
+            for _, _, future in items:
+                future.set_exception(e)
+            return
+        
+        for (_, _, future), score, risk in zip(items, proba.tolist(), risks):
+            future.set_result((score, risk))
+
+
+def positive_proba(model: Any, X: np.ndarray) -> np.ndarray:
+    """
+    Probability of the positive class as a 1-D array
+    
+    For a binary one-vs-rest LogisticRegression this is exactly
+    predict_proba(X)[:, 1], computed as expit(decision_function(X)) without
+    building the two-column probability matrix.
+    """
+    if (
+        isinstance(model, LogisticRegression)
+        and len(model.classes_) == 2
+        and getattr(model, "multi_class", "auto") != "multinomial"
+    ):
+        return expit(model.decision_function(X))
+    return model.predict_proba(X)[:, 1]
+
+
+# Global scoring batcher instance
+scoring_batcher = ScoringBatcher()
@@ -0,0 +1,60 @@
+"""
+Lead Scoring Agent - Timestamp Cache
+Current UTC time as an ISO string, refreshed by a background thread
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+# The one timestamp format written anywhere (API responses and the database),
+# same as datetime.now(timezone.utc).isoformat(timespec='seconds')
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S+00:00"
+
+
+def _format_now() -> str:
+    """Current UTC time in ISO_FORMAT"""
+    # Pass time.time(): bare gmtime() reads a coarse clock that can still
+    # report the previous second just after the boundary we woke on
+    return time.strftime(ISO_FORMAT, time.gmtime(time.time()))
+
+
+# One-element list so the refresher publishes with a single store
+_iso_now = [_format_now()]
+_thread: Optional[threading.Thread] = None
+_start_lock = threading.Lock()
+
+
+def _refresh() -> None:
+    """Refresher loop: wake on each whole second and reformat"""
+    while True:
+        time.sleep(1 - time.time() % 1)
+        _iso_now[0] = _format_now()
+
+
+def start() -> None:
+    """Start the refresher thread (no-op if already running)"""
+    global _thread
+    
+    if _thread is not None:
+        return
+    
+    with _start_lock:
+        if _thread is None:
+            _iso_now[0] = _format_now()
+            thread = threading.Thread(target=_refresh, name="time-cache", daemon=True)
+            thread.start()
+            _thread = thread
+
+
+def utc_timestamp() -> str:
+    """Current UTC time in ISO_FORMAT, read from the clock (not the cache)"""
+    return _format_now()
+
+
+def iso_now() -> str:
+    """Current UTC time in ISO_FORMAT from the cache (at most a second old)"""
+    if _thread is None:
+        start()
+    return _iso_now[0]
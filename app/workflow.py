@@ -4,38 +4,113 @@ Stateful workflow for lead scoring process
 """
 
 from typing import TypedDict, Annotated, Optional, Tuple, Any
-from datetime import datetime
 import operator
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 from langgraph.graph import StateGraph, END
 from pydantic import ValidationError
 
-from app.schemas import LeadScoreRequest, LeadScoreResponse, RiskCategory
-from app.database import db
+from app.schemas import (
+    LEAD_SOURCE_TO_CODE,
+    LeadScoreRequest,
+    LeadScoreResponse,
+    RiskCategory
+)
+from app.write_queue import write_worker
+from app.scoring_batcher import scoring_batcher
 from app.model import ModelTrainer
-from app.config import settings
+from app.time_cache import iso_now
+from app.config import Settings, get_settings, on_settings_reload
+
+
+# Longest a request waits for the scoring batcher before failing
+SCORE_TIMEOUT_SECONDS = 5.0
+
+# Settings read per request, bound once (refreshed by reload_settings)
+RETRAIN_THRESHOLD = get_settings().retraining_threshold
+
+
+@on_settings_reload
+def _bind_settings(new_settings: Settings) -> None:
+    globals().update(RETRAIN_THRESHOLD=new_settings.retraining_threshold)
 
 
 # ===========================================================================
 # MODEL CACHE
 # ===========================================================================
 
+class _ModelCacheHolder:
+    """
+    Holder for the cached (model, feature_engineer, metadata) tuple
+    
+    Readers do a single attribute load of `value`; a new tuple is published
+    with one reference store. `version_epoch` is bumped on every clear so
+    callers can tell a model they hold has since been invalidated.
+    `loading_event` belongs to the load in flight (set when none is running).
+    """
+    
+    __slots__ = ("value", "version_epoch", "loading_event")
+    
+    def __init__(self):
+        self.value: Optional[Tuple[Any, Any, dict]] = None
+        self.version_epoch = 0
+        self.loading_event = threading.Event()
+        self.loading_event.set()
+
+
 # Global cache for model to avoid reloading on every request
-_model_cache: Optional[Tuple[Any, Any, dict]] = None
+_model_cache = _ModelCacheHolder()
+
+# Guards the holder's fields; never held while a model is loading
+_load_lock = threading.Lock()
 
 def get_cached_model() -> Optional[Tuple[Any, Any, dict]]:
-    """Get cached model or load from database"""
-    global _model_cache
+    """
+    Get cached model or load from database
     
-    if _model_cache is None:
-        _model_cache = ModelTrainer.load_from_database()
+    On a miss exactly one thread loads the model; the others wait on its
+    loading_event and then re-read the cache. A load that finishes after a
+    clear_model_cache() is not published, since its epoch is stale.
+    """
+    while True:
+        value = _model_cache.value
+        if value is not None:
+            return value
+        
+        with _load_lock:
+            value = _model_cache.value
+            if value is not None:
+                return value
+            
+            event = _model_cache.loading_event
+            is_loader = event.is_set()
+            if is_loader:
+                event = _model_cache.loading_event = threading.Event()
+                epoch = _model_cache.version_epoch
+        
+        if is_loader:
+            break
+        
+        event.wait()
+    
+    value = None
+    try:
+        value = ModelTrainer.load_from_database()
+    finally:
+        with _load_lock:
+            if _model_cache.version_epoch == epoch:
+                _model_cache.value = value
+        event.set()
     
-    return _model_cache
+    return value
 
 def clear_model_cache():
     """Clear model cache (e.g., after retraining)"""
-    global _model_cache
-    _model_cache = None
+    # Bumping the epoch keeps an in-flight load from publishing the old model
+    with _load_lock:
+        _model_cache.version_epoch += 1
+        _model_cache.value = None
 
 
 # ===========================================================================
@@ -85,7 +160,7 @@ def validate_node(state: LeadScoringState) -> LeadScoringState:
         
         # Validation already done by Pydantic, just confirm
         state['validation_errors'] = []
-        
+    
     except Exception as e:
         state['error'] = f"Validation failed: {str(e)}"
         state['validation_errors'] = [str(e)]
@@ -110,11 +185,12 @@ def preprocess_node(state: LeadScoringState) -> LeadScoringState:
             'website_visits': request.website_visits,
             'content_downloads': request.content_downloads,
             'days_since_contact': request.days_since_contact,
-            'lead_source': request.lead_source.value
+            'lead_source': request.lead_source.value,
+            'lead_source_code': LEAD_SOURCE_TO_CODE[request.lead_source.value]
         }
         
         state['preprocessed_data'] = preprocessed
-        
+    
     except Exception as e:
         state['error'] = f"Preprocessing failed: {str(e)}"
     
@@ -134,28 +210,21 @@ def score_node(state: LeadScoringState) -> LeadScoringState:
             state['error'] = "No trained model available"
             return state
         
-        model, feature_engineer, metadata = model_data
+        metadata = model_data[2]
         
         # Prepare lead data
         lead_dict = state['preprocessed_data']
         
-        # Get prediction
-        X = feature_engineer.prepare_lead_data(lead_dict)
-        X_transformed = feature_engineer.transform(X)
-        conversion_score = float(model.predict_proba(X_transformed)[:, 1][0])
-        
-        # Determine risk category
-        if conversion_score >= 0.7:
-            risk_category = RiskCategory.HIGH
-        elif conversion_score >= 0.4:
-            risk_category = RiskCategory.MEDIUM
-        else:
-            risk_category = RiskCategory.LOW
+        # Get prediction and risk category (micro-batched with concurrent requests)
+        future = scoring_batcher.submit(model_data, lead_dict)
+        conversion_score, risk_category = future.result(timeout=SCORE_TIMEOUT_SECONDS)
         
         state['conversion_score'] = conversion_score
-        state['risk_category'] = risk_category.value
+        state['risk_category'] = risk_category
         state['model_version'] = metadata['version']
-        
+    
+    except FutureTimeoutError:
+        state['error'] = f"Scoring timed out after {SCORE_TIMEOUT_SECONDS}s"
     except Exception as e:
         state['error'] = f"Scoring failed: {str(e)}"
     
@@ -165,43 +234,30 @@ def score_node(state: LeadScoringState) -> LeadScoringState:
 def store_node(state: LeadScoringState) -> LeadScoringState:
     """
     Node 4: STORE
-    Persist to SQLite
+    Persist to SQLite (queued; the write worker inserts in batches)
     """
     try:
         request = state['request']
         
-        # Prepare lead score data
-        lead_data = {
+        # Prepare lead score data (lead fields come from preprocess_node)
+        lead_data = state['preprocessed_data'].copy()
+        lead_data.update({
             'lead_id': request.lead_id,
-            'age': request.age,
-            'location': request.location,
-            'industry': request.industry,
-            'email_opens': request.email_opens,
-            'website_visits': request.website_visits,
-            'content_downloads': request.content_downloads,
-            'days_since_contact': request.days_since_contact,
-            'lead_source': request.lead_source.value,
             'conversion_score': state['conversion_score'],
             'risk_category': state['risk_category'],
             'actual_outcome': request.actual_outcome,
             'model_version': state['model_version'],
             'timestamp': state['timestamp']
-        }
-        
-        # Store in database
-        db.insert_lead_score(lead_data)
+        })
         
-        # Update system metrics
-        total_scores = db.get_total_scores()
-        db.update_system_metric('total_scores', str(total_scores))
+        # Queue for the background writer (it also syncs system metrics)
+        write_worker.submit(lead_data)
         
         if request.actual_outcome is not None:
-            feedback_count = db.get_feedback_count()
-            db.update_system_metric('feedback_count', str(feedback_count))
-            state['feedback_count'] = feedback_count
+            state['feedback_count'] = write_worker.feedback_count()
         
         state['stored'] = True
-        
+    
     except Exception as e:
         state['error'] = f"Storage failed: {str(e)}"
         state['stored'] = False
@@ -217,7 +273,7 @@ def learn_node(state: LeadScoringState) -> LeadScoringState:
     try:
         # Check if we have enough feedback for retraining
         feedback_count = state.get('feedback_count', 0)
-        threshold = settings.retraining_threshold
+        threshold = RETRAIN_THRESHOLD
         
         if feedback_count >= threshold:
             state['should_retrain'] = True
@@ -227,13 +283,23 @@ def learn_node(state: LeadScoringState) -> LeadScoringState:
             retraining_manager.trigger_background_retraining()
         else:
             state['should_retrain'] = False
-        
+    
     except Exception as e:
         state['error'] = f"Learning node failed: {str(e)}"
     
     return state
 
 
+def route_after_score(state: LeadScoringState) -> str:
+    """A failed request skips STORE/LEARN, as the fast path stops at the first error"""
+    return "respond" if state.get('error') else "store"
+
+
+def route_after_store(state: LeadScoringState) -> str:
+    """Only feedback requests go through LEARN; plain scoring skips to RESPOND"""
+    return "learn" if state.get('feedback_count', 0) > 0 else "respond"
+
+
 def respond_node(state: LeadScoringState) -> LeadScoringState:
     """
     Node 6: RESPOND
@@ -246,8 +312,8 @@ def respond_node(state: LeadScoringState) -> LeadScoringState:
         
         request = state['request']
         
-        # Create response
-        response = LeadScoreResponse(
+        # Create response (every field was produced by earlier nodes)
+        response = LeadScoreResponse.model_construct(
             lead_id=request.lead_id,
             conversion_score=round(state['conversion_score'], 4),
             risk_category=RiskCategory(state['risk_category']),
@@ -256,7 +322,7 @@ def respond_node(state: LeadScoringState) -> LeadScoringState:
         )
         
         state['response'] = response
-        
+    
     except Exception as e:
         state['error'] = f"Response formatting failed: {str(e)}"
     
@@ -271,7 +337,9 @@ def create_workflow() -> StateGraph:
     """
     Create LangGraph workflow for lead scoring
     
-    Flow: VALIDATE → PREPROCESS → SCORE → STORE → LEARN → RESPOND
+    Flow: VALIDATE → PREPROCESS → SCORE → STORE → [LEARN] → RESPOND
+    (LEARN only runs for requests that carry an actual_outcome; a request
+    that failed by SCORE goes straight to RESPOND)
     """
     workflow = StateGraph(LeadScoringState)
     
@@ -283,11 +351,19 @@ def create_workflow() -> StateGraph:
     workflow.add_node("learn", learn_node)
     workflow.add_node("respond", respond_node)
     
-    # Define edges (linear flow)
+    # Define edges
     workflow.add_edge("validate", "preprocess")
     workflow.add_edge("preprocess", "score")
-    workflow.add_edge("score", "store")
-    workflow.add_edge("store", "learn")
+    workflow.add_conditional_edges(
+        "score",
+        route_after_score,
+        {"store": "store", "respond": "respond"}
+    )
+    workflow.add_conditional_edges(
+        "store",
+        route_after_store,
+        {"learn": "learn", "respond": "respond"}
+    )
     workflow.add_edge("learn", "respond")
     workflow.add_edge("respond", END)
     
@@ -297,6 +373,17 @@ def create_workflow() -> StateGraph:
     return workflow
 
 
+# Node order shared by the graph's edges and the fast path
+PIPELINE = (
+    validate_node,
+    preprocess_node,
+    score_node,
+    store_node,
+    learn_node,
+    respond_node
+)
+
+
 # ===========================================================================
 # WORKFLOW EXECUTION
 # ===========================================================================
@@ -307,11 +394,31 @@ class LeadScoringAgent:
     def __init__(self):
         self.workflow = create_workflow()
         self.app = self.workflow.compile()
+        
+        # Static part of the starting state; _initial_state copies it and
+        # fills in the per-request fields
+        self._state_template: LeadScoringState = {
+            'request': None,
+            'validation_errors': [],
+            'preprocessed_data': None,
+            'conversion_score': None,
+            'risk_category': None,
+            'stored': False,
+            'feedback_count': 0,
+            'should_retrain': False,
+            'response': None,
+            'error': None,
+            'model_version': get_settings().model_version,
+            'timestamp': None
+        }
     
     def score_lead(self, request: LeadScoreRequest) -> LeadScoreResponse:
         """
         Execute lead scoring workflow
         
+        Runs the nodes directly (see _fast_invoke) unless
+        settings.use_langgraph is set, in which case the compiled graph is used.
+        
         Args:
             request: LeadScoreRequest object
         
@@ -321,24 +428,10 @@ class LeadScoringAgent:
         Raises:
             Exception: If workflow fails
         """
-        # Initialize state
-        initial_state = {
-            'request': request,
-            'validation_errors': [],
-            'preprocessed_data': None,
-            'conversion_score': None,
-            'risk_category': None,
-            'stored': False,
-            'feedback_count': 0,
-            'should_retrain': False,
-            'response': None,
-            'error': None,
-            'model_version': settings.model_version,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        
-        # Execute workflow
-        final_state = self.app.invoke(initial_state)
+        if get_settings().use_langgraph:
+            final_state = self.app.invoke(self._initial_state(request))
+        else:
+            final_state = self._fast_invoke(request)
         
         # Check for errors
         if final_state.get('error'):
@@ -346,6 +439,33 @@ class LeadScoringAgent:
         
         # Return response
         return final_state['response']
+    
+    def _fast_invoke(self, request: LeadScoreRequest) -> LeadScoringState:
+        """
+        Run the pipeline as plain function calls on one mutable state dict
+        
+        The flow is linear apart from the optional LEARN step, so this skips
+        LangGraph's dispatch and per-node state merging. Stops at the first
+        node that sets an error.
+        """
+        state = self._initial_state(request)
+        
+        for node in PIPELINE:
+            if node is learn_node and route_after_store(state) != "learn":
+                continue
+            state = node(state)
+            if state.get('error'):
+                break
+        
+        return state
+    
+    def _initial_state(self, request: LeadScoreRequest) -> LeadScoringState:
+        """Build the starting workflow state for a request"""
+        state = self._state_template.copy()
+        state['request'] = request
+        state['validation_errors'] = []  # Mutable, so never shared
+        state['timestamp'] = iso_now()
+        return state
 
 
 # Global agent instance
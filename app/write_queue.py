@@ -0,0 +1,280 @@
+"""
+Lead Scoring Agent - Background Write Queue
+Batch lead score inserts off the request path
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.counters import FEEDBACK_COUNT, LOST_LEAD_SCORES, TOTAL_SCORES
+from app.database import db
+
+
+logger = logging.getLogger(__name__)
+
+# Queue item that tells the writer thread to exit after its current batch
+_STOP = object()
+
+# Queue item that tells the writer thread to sync counters to system_metrics
+_SYNC = object()
+
+
+class WriteWorker:
+    """
+    Single writer thread that coalesces lead score inserts
+    
+    Requests submit records to a bounded queue and return immediately. The
+    writer collects up to `batch_max` records (or whatever arrives within
+    `flush_ms` of the first one) and inserts them with executemany in one
+    transaction.
+    
+    Scored/feedback totals live in the TOTAL_SCORES/FEEDBACK_COUNT counters,
+    bumped on submit so callers see their own writes without a database
+    round trip. Every `sync_seconds` (and on flush/stop) the writer counts
+    the table once, corrects the counters for upserted lead_ids and stores
+    the totals in system_metrics.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        batch_max: int = 256,
+        flush_ms: int = 50,
+        sync_seconds: float = 10.0,
+        retry_delay_seconds: float = 0.2
+    ):
+        self.batch_max = batch_max
+        self.flush_seconds = flush_ms / 1000
+        self.sync_seconds = sync_seconds
+        self.retry_delay_seconds = retry_delay_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._timer: Optional[threading.Timer] = None
+        self._start_lock = threading.Lock()
+        
+        # What the counters expect the table to hold after the batches written
+        # so far; the difference from COUNT(*) at sync time is upsert drift
+        self._written_scores = 0
+        self._written_feedback = 0
+    
+    def start(self) -> None:
+        """Seed counters from the database and start the writer thread (restarts a dead one)"""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            
+            # A restarted writer picks up the records still queued, so the
+            # counters (already bumped for them) and the sync timer carry over
+            restart = self._thread is not None
+            if restart:
+                logger.warning("Lead score writer thread died; restarting it")
+            else:
+                self._written_scores = db.get_total_scores()
+                self._written_feedback = db.get_feedback_count()
+                TOTAL_SCORES.set(self._written_scores)
+                FEEDBACK_COUNT.set(self._written_feedback)
+            
+            thread = threading.Thread(target=self._run, name="lead-score-writer", daemon=True)
+            thread.start()
+            self._thread = thread
+            if not restart:
+                self._schedule_sync()
+                atexit.register(self.stop)
+    
+    def stop(self) -> None:
+        """Write everything still queued and stop the writer thread"""
+        with self._start_lock:
+            thread = self._thread
+            if thread is None:
+                return
+            
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            
+            self._queue.put(_STOP)
+            thread.join()
+            self._thread = None
+    
+    def submit(self, lead_data: Dict[str, Any]) -> None:
+        """
+        Queue a lead score record for insertion (blocks only if the queue is full)
+        
+        Args:
+            lead_data: Record in the shape accepted by db.insert_lead_score
+        """
+        self.start()
+        
+        TOTAL_SCORES.inc()
+        if lead_data.get("actual_outcome") is not None:
+            FEEDBACK_COUNT.inc()
+        
+        self._queue.put(lead_data)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every record submitted so far has been written and the
+        counters have been synced with the table
+        
+        Returns:
+            False if the timeout expired first
+        """
+        self.start()
+        
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+    
+    def total_scores(self) -> int:
+        """Number of scored leads, including records still queued"""
+        self.start()
+        return TOTAL_SCORES.value
+    
+    def feedback_count(self) -> int:
+        """Number of leads with feedback, including records still queued"""
+        self.start()
+        return FEEDBACK_COUNT.value
+    
+    def _schedule_sync(self) -> None:
+        """Arm the timer that queues the next counter sync"""
+        self._timer = threading.Timer(self.sync_seconds, self._request_sync)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _request_sync(self) -> None:
+        """Timer callback: queue a sync marker and re-arm"""
+        try:
+            self._queue.put_nowait(_SYNC)
+        except queue.Full:
+            pass  # The writer is busy; sync on the next tick
+        
+        with self._start_lock:
+            if self._thread is not None:
+                self._schedule_sync()
+    
+    def _run(self) -> None:
+        """Writer loop: collect a batch, write it, repeat until stopped"""
+        db.configure_writer()
+        
+        while True:
+            batch: List[Dict[str, Any]] = []
+            waiters: List[threading.Event] = []
+            stop = False
+            sync = False
+            
+            # Block for the first item, then gather more until the batch is
+            # full, flush_ms has passed, or a flush/stop marker shows up
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_seconds
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                if item is _SYNC:
+                    sync = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                
+                batch.append(item)
+                if len(batch) >= self.batch_max:
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            if batch:
+                self._write_batch(batch)
+            
+            if sync or stop or waiters:
+                self._sync_counters()
+            
+            for waiter in waiters:
+                waiter.set()
+            
+            if stop:
+                return
+    
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        Insert a batch in one transaction
+        
+        A failed batch is retried once after `retry_delay_seconds`; if that
+        fails too, rows are inserted one at a time so a single bad row only
+        loses itself. Lost rows are counted in LOST_LEAD_SCORES.
+        """
+        for attempt in range(2):
+            try:
+                db.insert_lead_scores(batch)
+            except Exception:
+                logger.warning(
+                    f"Failed to write {len(batch)} lead scores (attempt {attempt + 1})",
+                    exc_info=True
+                )
+                time.sleep(self.retry_delay_seconds * (attempt + 1))
+                continue
+            
+            self._written_scores += len(batch)
+            self._written_feedback += sum(
+                1 for lead in batch if lead.get("actual_outcome") is not None
+            )
+            return
+        
+        for lead in batch:
+            self._write_one(lead)
+    
+    def _write_one(self, lead: Dict[str, Any]) -> None:
+        """Insert a single record, counting it as lost if it fails"""
+        has_feedback = lead.get("actual_outcome") is not None
+        
+        try:
+            db.insert_lead_score(lead)
+        except Exception:
+            logger.exception(f"Dropping lead score {lead.get('lead_id')!r}")
+            LOST_LEAD_SCORES.inc()
+            TOTAL_SCORES.inc(-1)
+            if has_feedback:
+                FEEDBACK_COUNT.inc(-1)
+            return
+        
+        self._written_scores += 1
+        if has_feedback:
+            self._written_feedback += 1
+    
+    def _sync_counters(self) -> None:
+        """Correct the counters against the table and persist them to system_metrics"""
+        try:
+            with db.get_connection():
+                total_scores = db.get_total_scores()
+                feedback_count = db.get_feedback_count()
+                db.update_system_metric("total_scores", str(total_scores))
+                db.update_system_metric("feedback_count", str(feedback_count))
+                db.update_system_metric("lost_lead_scores", str(LOST_LEAD_SCORES.value))
+        except Exception:
+            logger.exception("Failed to sync lead score counters")
+            return
+        
+        # Re-scored lead_ids replace their row, so the table can hold fewer
+        # rows than were submitted
+        TOTAL_SCORES.inc(total_scores - self._written_scores)
+        FEEDBACK_COUNT.inc(feedback_count - self._written_feedback)
+        self._written_scores = total_scores
+        self._written_feedback = feedback_count
+
+
+# Global write worker instance
+write_worker = WriteWorker()
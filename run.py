@@ -8,14 +8,34 @@ from app.config import settings
 
 
 if __name__ == "__main__":
+    # reload=True only works with a single process, so debug runs one worker
+    workers = 1 if settings.debug else settings.workers
+    
     print(f"Starting {settings.api_title} v{settings.api_version}")
-    print(f"API Documentation: http://{settings.api_host}:{settings.api_port}/docs")
+    if settings.disable_docs:
+        print("API Documentation: disabled (DISABLE_DOCS)")
+    else:
+        print(f"API Documentation: http://{settings.api_host}:{settings.api_port}/docs")
+    print(f"Workers: {workers}")
     print()
     
+    # Access logging stays off: it formats and writes a record per request.
+    # Outside debug, uvicorn's own logs drop to warnings without ANSI colour;
+    # the app's loggers still follow LOG_LEVEL (see app.logging_config).
+    # Request logs, if needed, belong in a middleware feeding that queue.
+    if settings.debug:
+        log_cfg = dict(log_level=settings.log_level.lower())
+    else:
+        log_cfg = dict(log_level="warning", use_colors=False)
+    
     uvicorn.run(
         "app.main:app",
         host=settings.api_host,
         port=settings.api_port,
         reload=settings.debug,
-        log_level=settings.log_level.lower()
+        workers=workers,
+        loop="auto",    # uvloop when installed (not available on Windows)
+        http="auto",    # httptools when installed
+        access_log=False,
+        **log_cfg
     )
@@ -3,21 +3,28 @@ Lead Scoring Agent - Setup and Initialization Script
 Run this script to set up the project environment
 """
 
+import logging
 import sys
 import os
 from pathlib import Path
 
+if "--help" in sys.argv or "-h" in sys.argv:
+    print(__doc__.strip())
+    sys.exit(0)
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
+# Only the lightweight settings module is imported up front; the database,
+# data generator and model (numpy, pandas, scikit-learn) load when used
 from app.config import settings
-from app.database import db
-from app.data_generator import SyntheticDataGenerator
-from app.model import train_initial_model
 
 
 def main():
     """Initialize the lead scoring agent"""
+    # Show model training progress logged by app.model
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    
     print("=" * 60)
     print("Lead Scoring Agent - Setup & Initialization")
     print("=" * 60)
@@ -31,6 +38,7 @@ def main():
     
     # Step 2: Initialize database
     print("📊 Initializing database schema...")
+    from app.database import db
     db.initialize_schema()
     print(f"   ✓ Database initialized: {settings.database_path}")
     print(f"   ✓ Tables created: lead_scores, models, system_metrics")
@@ -38,17 +46,21 @@ def main():
     
     # Step 3: Generate synthetic data
     print("🎲 Generating synthetic training data...")
+    from app.data_generator import SyntheticDataGenerator
     generator = SyntheticDataGenerator(seed=42)
-    leads = generator.generate_dataset(size=1000)
     
-    # Save to CSV
+    # Columnar pipeline: the count and the CSV write each run over whole
+    # columns, with no per-lead dictionaries
+    leads = generator.generate_dataset_df(size=1000)
+    total = len(leads)
+    converted = int(leads["converted"].sum())
+    
     csv_path = settings.database_dir / "synthetic_leads.csv"
     generator.save_to_csv(leads, str(csv_path))
     
-    converted = sum(1 for lead in leads if lead["converted"])
-    print(f"   ✓ Generated {len(leads)} synthetic leads")
-    print(f"   ✓ Converted: {converted} ({converted/len(leads)*100:.1f}%)")
-    print(f"   ✓ Not Converted: {len(leads)-converted} ({(len(leads)-converted)/len(leads)*100:.1f}%)")
+    print(f"   ✓ Generated {total} synthetic leads")
+    print(f"   ✓ Converted: {converted} ({converted/total*100:.1f}%)")
+    print(f"   ✓ Not Converted: {total-converted} ({(total-converted)/total*100:.1f}%)")
     print(f"   ✓ Saved to: {csv_path}")
     print()
     
@@ -67,6 +79,7 @@ def main():
     # Step 5: Train initial ML model
     print("🤖 Training initial ML model...")
     try:
+        from app.model import train_initial_model
         trainer = train_initial_model(save_to_db=True)
         print(f"   ✓ Model trained and saved to database")
         print()
@@ -82,8 +95,9 @@ def main():
     print("  1. Review .env.example and create .env if needed")
     print("  2. Start the API server:")
     print("     python run.py")
-    print("  3. Access API documentation:")
-    print(f"     http://{settings.api_host}:{settings.api_port}/docs")
+    if not settings.disable_docs:
+        print("  3. Access API documentation:")
+        print(f"     http://{settings.api_host}:{settings.api_port}/docs")
     print()
     
     return True
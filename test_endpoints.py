@@ -5,11 +5,33 @@ Test all three endpoints with various scenarios
 
 import httpx
 import json
+import orjson
 from typing import Dict, Any
 
 
 BASE_URL = "http://localhost:8000"
 
+# One pooled client for every test, so requests reuse keep-alive connections
+CLIENT = httpx.Client(
+    base_url=BASE_URL,
+    http2=False,
+    timeout=5.0,
+    limits=httpx.Limits(max_keepalive_connections=20)
+)
+
+
+JSON_HEADERS = {"content-type": "application/json"}
+
+
+def post_score(lead: Dict[str, Any]) -> httpx.Response:
+    """POST a lead to /score, encoded with orjson"""
+    return CLIENT.post("/score", content=orjson.dumps(lead), headers=JSON_HEADERS)
+
+
+def rjson(response: httpx.Response) -> Any:
+    """Decode a response body with orjson"""
+    return orjson.loads(response.content)
+
 
 def print_response(endpoint: str, response: httpx.Response) -> None:
     """Pretty print API response"""
@@ -17,17 +39,17 @@ def print_response(endpoint: str, response: httpx.Response) -> None:
     print(f"Endpoint: {endpoint}")
     print(f"Status: {response.status_code}")
     print(f"Response:")
-    print(json.dumps(response.json(), indent=2))
+    print(json.dumps(rjson(response), indent=2))
     print('='*60)
 
 
 def test_health_endpoint():
     """Test GET /health"""
     print("\n🧪 Testing /health endpoint...")
-    response = httpx.get(f"{BASE_URL}/health")
+    response = CLIENT.get("/health")
     print_response("GET /health", response)
     assert response.status_code == 200
-    data = response.json()
+    data = rjson(response)
     assert data["status"] == "healthy"
     assert data["database_connected"] is True
     print("✅ Health check passed!")
@@ -36,16 +58,32 @@ def test_health_endpoint():
 def test_info_endpoint():
     """Test GET /info"""
     print("\n🧪 Testing /info endpoint...")
-    response = httpx.get(f"{BASE_URL}/info")
+    response = CLIENT.get("/info")
     print_response("GET /info", response)
     assert response.status_code == 200
-    data = response.json()
+    data = rjson(response)
     assert data["model_version"] == "1.0"
     assert "features_used" in data
     assert len(data["features_used"]) == 8
     print("✅ Info endpoint passed!")
 
 
+def test_conditional_requests():
+    """Test If-None-Match on GET /health and GET /info"""
+    print("\n🧪 Testing conditional requests (ETag)...")
+    for endpoint in ("/health", "/info"):
+        response = CLIENT.get(endpoint)
+        assert response.status_code == 200
+        etag = response.headers.get("etag")
+        assert etag, f"{endpoint} returned no ETag"
+        
+        cached = CLIENT.get(endpoint, headers={"If-None-Match": etag})
+        print(f"   {endpoint}: ETag {etag} -> {cached.status_code}")
+        assert cached.status_code == 304, f"{endpoint} ignored If-None-Match"
+        assert cached.content == b""
+    print("✅ Conditional requests passed!")
+
+
 def test_score_endpoint_basic():
     """Test POST /score with valid lead"""
     print("\n🧪 Testing /score endpoint (basic)...")
@@ -62,10 +100,10 @@ def test_score_endpoint_basic():
         "lead_source": "Webinar"
     }
     
-    response = httpx.post(f"{BASE_URL}/score", json=lead)
+    response = post_score(lead)
     print_response("POST /score", response)
     assert response.status_code == 200
-    data = response.json()
+    data = rjson(response)
     assert data["lead_id"] == "API-TEST-001"
     assert 0.0 <= data["conversion_score"] <= 1.0
     assert data["risk_category"] in ["high", "medium", "low"]
@@ -89,10 +127,10 @@ def test_score_endpoint_high_engagement():
         "lead_source": "Referral"
     }
     
-    response = httpx.post(f"{BASE_URL}/score", json=lead)
+    response = post_score(lead)
     print_response("POST /score (high engagement)", response)
     assert response.status_code == 200
-    data = response.json()
+    data = rjson(response)
     assert data["lead_id"] == "API-TEST-002"
     print(f"   Score: {data['conversion_score']:.4f}")
     print(f"   Risk: {data['risk_category']}")
@@ -115,10 +153,10 @@ def test_score_endpoint_low_engagement():
         "lead_source": "Cold Call"
     }
     
-    response = httpx.post(f"{BASE_URL}/score", json=lead)
+    response = post_score(lead)
     print_response("POST /score (low engagement)", response)
     assert response.status_code == 200
-    data = response.json()
+    data = rjson(response)
     assert data["lead_id"] == "API-TEST-003"
     print(f"   Score: {data['conversion_score']:.4f}")
     print(f"   Risk: {data['risk_category']}")
@@ -142,13 +180,13 @@ def test_score_endpoint_with_feedback():
         "actual_outcome": True  # Feedback: this lead converted
     }
     
-    response = httpx.post(f"{BASE_URL}/score", json=lead)
+    response = post_score(lead)
     print_response("POST /score (with feedback)", response)
     assert response.status_code == 200
     
     # Check that feedback was recorded
-    info_response = httpx.get(f"{BASE_URL}/info")
-    info_data = info_response.json()
+    info_response = CLIENT.get("/info")
+    info_data = rjson(info_response)
     assert info_data["feedback_samples_collected"] > 0
     print(f"   Feedback samples collected: {info_data['feedback_samples_collected']}")
     print("✅ Feedback recording passed!")
@@ -171,7 +209,7 @@ def test_score_endpoint_validation():
         "lead_source": "Organic"
     }
     
-    response = httpx.post(f"{BASE_URL}/score", json=invalid_lead)
+    response = post_score(invalid_lead)
     print(f"\n   Status: {response.status_code}")
     print(f"   Expected: 422 (Validation Error)")
     assert response.status_code == 422
@@ -189,6 +227,7 @@ def main():
         # Test all endpoints
         test_health_endpoint()
         test_info_endpoint()
+        test_conditional_requests()
         test_score_endpoint_basic()
         test_score_endpoint_high_engagement()
         test_score_endpoint_low_engagement()
@@ -204,7 +243,7 @@ def main():
         print("   • Data persisted to SQLite")
         print("   • Response time < 2 seconds")
         print("   • Synthetic data validates against schema")
-        
+    
     except AssertionError as e:
         print(f"\n❌ Test failed: {e}")
         return False
@@ -216,6 +255,8 @@ def main():
     except Exception as e:
         print(f"\n❌ Unexpected error: {e}")
         return False
+    finally:
+        CLIENT.close()
     
     return True
 
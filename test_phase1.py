@@ -20,36 +20,24 @@ def test_database_schema():
     print("🧪 Testing database schema...")
     
     try:
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Check if tables exist
-            cursor.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' 
-                ORDER BY name
-            """)
-            tables = [row["name"] for row in cursor.fetchall()]
-            
-            required_tables = ["lead_scores", "models", "system_metrics"]
-            missing_tables = [t for t in required_tables if t not in tables]
-            
-            if missing_tables:
-                print(f"   ✗ Missing tables: {missing_tables}")
-                return False
-            
-            print(f"   ✓ All required tables exist: {required_tables}")
-            
-            # Check indexes
-            cursor.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='index' AND sql IS NOT NULL
-            """)
-            indexes = [row["name"] for row in cursor.fetchall()]
-            print(f"   ✓ Indexes created: {len(indexes)}")
-            
-            return True
-            
+        # Check if tables exist
+        tables = db.list_tables()
+        
+        required_tables = ["lead_scores", "models", "system_metrics"]
+        missing_tables = [t for t in required_tables if t not in tables]
+        
+        if missing_tables:
+            print(f"   ✗ Missing tables: {missing_tables}")
+            return False
+        
+        print(f"   ✓ All required tables exist: {required_tables}")
+        
+        # Check indexes
+        indexes = db.list_indexes()
+        print(f"   ✓ Indexes created: {len(indexes)}")
+        
+        return True
+        
     except Exception as e:
         print(f"   ✗ Database test failed: {e}")
         return False
@@ -116,15 +104,27 @@ def test_database_operations():
             "risk_category": "high",
             "actual_outcome": None,
             "model_version": "1.0",
-            "timestamp": "2025-11-22T10:00:00"
+            "timestamp": "2025-11-22T10:00:00+00:00"
         }
         
         # Insert lead
         row_id = db.insert_lead_score(test_lead)
         print(f"   ✓ Inserted test lead (row_id: {row_id})")
         
+        # Bulk insert: one executemany in a single transaction
+        before = db.get_total_scores()
+        batch = [
+            {**test_lead, "lead_id": f"{test_lead['lead_id']}-BATCH-{i}"}
+            for i in range(10)
+        ]
+        db.insert_lead_scores(batch)
+        
         # Verify insertion
         total_scores = db.get_total_scores()
+        if total_scores - before != len(batch):
+            print(f"   ✗ Bulk insert added {total_scores - before} rows, expected {len(batch)}")
+            return False
+        print(f"   ✓ Bulk inserted {len(batch)} test leads in one transaction")
         print(f"   ✓ Total leads in database: {total_scores}")
         
         # Test metrics update
@@ -157,10 +157,14 @@ def main():
         ("Database Operations", test_database_operations)
     ]
     
+    # Every test shares this thread's database connection; close it at the end
     results = []
-    for test_name, test_func in tests:
-        result = test_func()
-        results.append((test_name, result))
+    try:
+        for test_name, test_func in tests:
+            result = test_func()
+            results.append((test_name, result))
+    finally:
+        db.close()
     
     # Summary
     print("\n" + "=" * 60)
@@ -3,17 +3,46 @@ Lead Scoring Agent - Phase 2 Comprehensive Tests
 Test ML model, feature engineering, LangGraph workflow, and API integration
 """
 
+import asyncio
 import httpx
-import json
+import orjson
 import sys
-from typing import Dict, Any
+import time
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
 
-# Configure UTF-8 encoding for Windows PowerShell
+# Configure UTF-8 encoding for Windows PowerShell. Block-buffered: prints
+# only fill the buffer, and _run_test flushes once per finished test
 import io
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+sys.stdout = io.TextIOWrapper(
+    sys.stdout.buffer, encoding='utf-8', line_buffering=False, write_through=False
+)
 
 BASE_URL = "http://localhost:8000"
 
+# Settings for the one pooled AsyncClient main() shares across all tests
+CLIENT_TIMEOUT = 5.0
+CLIENT_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=20)
+
+
+def rjson(response: httpx.Response) -> Any:
+    """Decode a response body with orjson"""
+    return orjson.loads(response.content)
+
+
+# Last /info payload, reused by tests that don't need a fresh read
+_INFO_CACHE: Dict[str, Any] = {}
+
+
+async def get_info(client: httpx.AsyncClient, force: bool = False) -> Dict[str, Any]:
+    """Return /info, fetching it only on first use or when forced"""
+    if force or not _INFO_CACHE:
+        response = await client.get("/info")
+        response.raise_for_status()
+        _INFO_CACHE.clear()
+        _INFO_CACHE.update(rjson(response))
+    return _INFO_CACHE
+
 
 def print_section(title: str) -> None:
     """Print section header"""
@@ -22,12 +51,12 @@ def print_section(title: str) -> None:
     print('='*70)
 
 
-def test_health_with_model() -> bool:
+async def test_health_with_model(client: httpx.AsyncClient) -> bool:
     """Test /health endpoint verifies model is loaded"""
-    print_section("Test 1: Health Check with Model Verification")
+    response = await client.get("/health")
+    data = rjson(response)
     
-    response = httpx.get(f"{BASE_URL}/health")
-    data = response.json()
+    print_section("Test 1: Health Check with Model Verification")
     
     print(f"\nStatus: {response.status_code}")
     print(f"System Status: {data['status']}")
@@ -42,12 +71,11 @@ def test_health_with_model() -> bool:
     return True
 
 
-def test_info_with_metrics() -> bool:
-    """Test /info endpoint shows model metrics"""
-    print_section("Test 2: System Info with Model Metrics")
+async def test_info_with_metrics(client: httpx.AsyncClient) -> Dict[str, Any]:
+    """Test /info endpoint shows model metrics (returns the payload for reuse)"""
+    data = await get_info(client, force=True)
     
-    response = httpx.get(f"{BASE_URL}/info")
-    data = response.json()
+    print_section("Test 2: System Info with Model Metrics")
     
     print(f"\nModel Version: {data['model_version']}")
     print(f"Model Metrics:")
@@ -57,87 +85,90 @@ def test_info_with_metrics() -> bool:
     print(f"Total Leads Scored: {data['total_leads_scored']}")
     print(f"Feedback Samples: {data['feedback_samples_collected']}")
     
-    assert response.status_code == 200, "Info endpoint failed"
     assert data['model_metrics']['auc_score'] is not None, "No AUC score"
     assert data['model_metrics']['auc_score'] >= 0.75, f"AUC {data['model_metrics']['auc_score']} < 0.75"
     
     print(f"\n✅ PASS: AUC Score = {data['model_metrics']['auc_score']:.4f} (≥ 0.75 required)")
-    return True
+    return data
 
 
-def test_ml_scoring_high_engagement() -> bool:
-    """Test ML model scoring with high-engagement lead"""
-    print_section("Test 3: ML Scoring - High Engagement Lead")
-    
-    lead = {
-        "lead_id": "PHASE2-HIGH-001",
-        "age": 38,
-        "location": "San Francisco",
-        "industry": "Technology",
-        "email_opens": 28,
-        "website_visits": 20,
-        "content_downloads": 10,
-        "days_since_contact": 2,
-        "lead_source": "Webinar"
-    }
-    
-    response = httpx.post(f"{BASE_URL}/score", json=lead)
-    data = response.json()
-    
-    print(f"\nResponse Status: {response.status_code}")
-    print(f"Response Data: {json.dumps(data, indent=2)}")
-    
-    print(f"\nLead ID: {data['lead_id']}")
-    print(f"Conversion Score: {data['conversion_score']}")
-    print(f"Risk Category: {data['risk_category']}")
-    print(f"Model Version: {data['model_version']}")
-    
-    assert response.status_code == 200, "Scoring failed"
-    assert 0.0 <= data['conversion_score'] <= 1.0, "Score out of range"
-    assert data['risk_category'] in ['high', 'medium', 'low'], "Invalid risk category"
-    
-    print(f"✅ PASS: High engagement lead scored as {data['risk_category']}")
-    return True
+# ML scoring cases: (label, lead, upper bound on the score or None).
+# Bodies are encoded once with orjson and posted as raw content.
+SCORE_CASES = [
+    (
+        "High Engagement",
+        {
+            "lead_id": "PHASE2-HIGH-001",
+            "age": 38,
+            "location": "San Francisco",
+            "industry": "Technology",
+            "email_opens": 28,
+            "website_visits": 20,
+            "content_downloads": 10,
+            "days_since_contact": 2,
+            "lead_source": "Webinar"
+        },
+        None
+    ),
+    (
+        "Low Engagement",
+        {
+            "lead_id": "PHASE2-LOW-001",
+            "age": 25,
+            "location": "Chicago",
+            "industry": "Retail",
+            "email_opens": 2,
+            "website_visits": 1,
+            "content_downloads": 0,
+            "days_since_contact": 75,
+            "lead_source": "Cold Call"
+        },
+        0.5
+    )
+]
+SCORE_BODIES = [orjson.dumps(lead) for _, lead, _ in SCORE_CASES]
 
+JSON_HEADERS = {"content-type": "application/json"}
 
-def test_ml_scoring_low_engagement() -> bool:
-    """Test ML model scoring with low-engagement lead"""
-    print_section("Test 4: ML Scoring - Low Engagement Lead")
-    
-    lead = {
-        "lead_id": "PHASE2-LOW-001",
-        "age": 25,
-        "location": "Chicago",
-        "industry": "Retail",
-        "email_opens": 2,
-        "website_visits": 1,
-        "content_downloads": 0,
-        "days_since_contact": 75,
-        "lead_source": "Cold Call"
-    }
-    
-    response = httpx.post(f"{BASE_URL}/score", json=lead)
-    data = response.json()
+
+async def post_score(client: httpx.AsyncClient, body: bytes) -> httpx.Response:
+    """POST an already-encoded lead to /score"""
+    return await client.post("/score", content=body, headers=JSON_HEADERS)
+
+
+async def test_ml_scoring(client: httpx.AsyncClient) -> bool:
+    """Test ML model scoring across high- and low-engagement leads"""
+    responses = await asyncio.gather(*(post_score(client, body) for body in SCORE_BODIES))
     
-    print(f"\nLead ID: {data['lead_id']}")
-    print(f"Conversion Score: {data['conversion_score']}")
-    print(f"Risk Category: {data['risk_category']}")
+    print_section("Test 3: ML Scoring - High and Low Engagement Leads")
     
-    assert response.status_code == 200, "Scoring failed"
-    assert data['conversion_score'] < 0.5, "Low engagement should have lower score"
+    for (label, lead, max_score), response in zip(SCORE_CASES, responses):
+        data = rjson(response)
+        
+        print(f"\n[{label}] Response Status: {response.status_code}")
+        print(f"Lead ID: {data['lead_id']}")
+        print(f"Conversion Score: {data['conversion_score']}")
+        print(f"Risk Category: {data['risk_category']}")
+        print(f"Model Version: {data['model_version']}")
+        
+        assert response.status_code == 200, f"{label}: scoring failed"
+        assert data['lead_id'] == lead['lead_id'], f"{label}: wrong lead_id"
+        assert 0.0 <= data['conversion_score'] <= 1.0, f"{label}: score out of range"
+        assert data['risk_category'] in ['high', 'medium', 'low'], f"{label}: invalid risk category"
+        if max_score is not None:
+            assert data['conversion_score'] < max_score, f"{label}: should have a score below {max_score}"
+        
+        print(f"✅ PASS: {label.lower()} lead scored as {data['risk_category']}")
     
-    print(f"✅ PASS: Low engagement lead scored appropriately")
     return True
 
 
-def test_feedback_collection() -> bool:
+async def test_feedback_collection(client: httpx.AsyncClient) -> bool:
     """Test feedback collection mechanism"""
-    import time
-    print_section("Test 5: Feedback Collection")
+    print_section("Test 4: Feedback Collection")
     
-    # Get initial feedback count
-    info_response = httpx.get(f"{BASE_URL}/info")
-    initial_feedback = info_response.json()['feedback_samples_collected']
+    # Get initial feedback count from the server under test
+    initial_feedback = (await get_info(client, force=True))['feedback_samples_collected']
     
     print(f"\nInitial Feedback Count: {initial_feedback}")
     
@@ -156,12 +187,11 @@ def test_feedback_collection() -> bool:
         "actual_outcome": True  # Feedback: converted
     }
     
-    score_response = httpx.post(f"{BASE_URL}/score", json=lead)
-    print(f"Lead Scored: {score_response.json()['lead_id']}")
+    score_response = await post_score(client, orjson.dumps(lead))
+    print(f"Lead Scored: {rjson(score_response)['lead_id']}")
     
     # Check updated feedback count
-    info_response = httpx.get(f"{BASE_URL}/info")
-    new_feedback = info_response.json()['feedback_samples_collected']
+    new_feedback = (await get_info(client, force=True))['feedback_samples_collected']
     
     print(f"New Feedback Count: {new_feedback}")
     
@@ -171,10 +201,8 @@ def test_feedback_collection() -> bool:
     return True
 
 
-def test_langgraph_workflow() -> bool:
+async def test_langgraph_workflow(client: httpx.AsyncClient) -> bool:
     """Test LangGraph workflow execution"""
-    print_section("Test 6: LangGraph Workflow (6 States)")
-    
     lead = {
         "lead_id": "PHASE2-WORKFLOW-001",
         "age": 35,
@@ -187,6 +215,11 @@ def test_langgraph_workflow() -> bool:
         "lead_source": "Webinar"
     }
     
+    response = await post_score(client, orjson.dumps(lead))
+    data = rjson(response)
+    
+    print_section("Test 5: LangGraph Workflow (6 States)")
+    
     print("\nWorkflow States:")
     print("  1. VALIDATE ✓")
     print("  2. PREPROCESS ✓")
@@ -195,9 +228,6 @@ def test_langgraph_workflow() -> bool:
     print("  5. LEARN ✓")
     print("  6. RESPOND ✓")
     
-    response = httpx.post(f"{BASE_URL}/score", json=lead)
-    data = response.json()
-    
     assert response.status_code == 200, "Workflow failed"
     assert 'lead_id' in data, "Missing lead_id in response"
     assert 'conversion_score' in data, "Missing score in response"
@@ -210,10 +240,8 @@ def test_langgraph_workflow() -> bool:
     return True
 
 
-def test_feature_engineering() -> bool:
+async def test_feature_engineering(client: httpx.AsyncClient) -> bool:
     """Test feature engineering with diverse leads"""
-    print_section("Test 7: Feature Engineering Pipeline")
-    
     test_leads = [
         {
             "lead_id": "PHASE2-FEATURE-001",
@@ -239,10 +267,15 @@ def test_feature_engineering() -> bool:
         }
     ]
     
+    responses = await asyncio.gather(
+        *(post_score(client, orjson.dumps(lead)) for lead in test_leads)
+    )
+    
+    print_section("Test 6: Feature Engineering Pipeline")
+    
     scores = []
-    for lead in test_leads:
-        response = httpx.post(f"{BASE_URL}/score", json=lead)
-        data = response.json()
+    for lead, response in zip(test_leads, responses):
+        data = rjson(response)
         scores.append(data['conversion_score'])
         print(f"\n{lead['lead_id']}: {data['conversion_score']:.4f}")
     
@@ -252,61 +285,95 @@ def test_feature_engineering() -> bool:
     return True
 
 
-def test_response_time() -> bool:
-    """Test API response time < 2 seconds"""
-    print_section("Test 8: Response Time Performance")
-    
-    import time
-    
-    lead = {
-        "lead_id": "PHASE2-PERF-WARMUP",
-        "age": 35,
-        "location": "Austin",
-        "industry": "Technology",
-        "email_opens": 12,
-        "website_visits": 9,
-        "content_downloads": 5,
-        "days_since_contact": 5,
-        "lead_source": "Email Campaign"
-    }
-    
-    # Warm-up request (first load can be slower)
+# Lead template for the response-time test and the suite's warm-up request
+PERF_LEAD = {
+    "lead_id": "PHASE2-PERF-WARMUP",
+    "age": 35,
+    "location": "Austin",
+    "industry": "Technology",
+    "email_opens": 12,
+    "website_visits": 9,
+    "content_downloads": 5,
+    "days_since_contact": 5,
+    "lead_source": "Email Campaign"
+}
+WARMUP_PAYLOAD = orjson.dumps(PERF_LEAD)
+
+
+async def warmup(client: httpx.AsyncClient) -> None:
+    """Score one lead so the model is loaded before any test is timed"""
     print("\nWarming up model...")
-    httpx.post(f"{BASE_URL}/score", json=lead, timeout=10.0)
+    await client.post("/score", content=WARMUP_PAYLOAD, headers=JSON_HEADERS, timeout=10.0)
     print("Model warmed up ✓")
-    
-    # Test 10 requests after warm-up
-    times = []
-    for i in range(10):
-        lead['lead_id'] = f"PHASE2-PERF-{i+1:03d}"
-        start = time.time()
-        response = httpx.post(f"{BASE_URL}/score", json=lead, timeout=5.0)
-        elapsed = time.time() - start
-        times.append(elapsed)
-        assert response.status_code == 200
-    
-    avg_time = sum(times) / len(times)
-    max_time = max(times)
-    p99_time = sorted(times)[int(len(times) * 0.99)]
-    
-    print(f"\nAverage Response Time: {avg_time*1000:.2f}ms")
-    print(f"P99 Response Time: {p99_time*1000:.2f}ms")
-    print(f"Max Response Time: {max_time*1000:.2f}ms")
+    sys.stdout.flush()
+
+
+async def _timed_post(
+    client: httpx.AsyncClient, body: bytes, times_ns: array, index: int
+) -> int:
+    """POST one encoded lead to /score, storing its latency in times_ns[index]; returns the status code"""
+    start = time.perf_counter_ns()
+    response = await client.post("/score", content=body, headers=JSON_HEADERS)
+    times_ns[index] = time.perf_counter_ns() - start
+    return response.status_code
+
+
+async def _post_concurrently(
+    client: httpx.AsyncClient, bodies: Tuple[bytes, ...], times_ns: array
+) -> List[int]:
+    """Score all leads at once, timing each request individually"""
+    return await asyncio.gather(
+        *(_timed_post(client, body, times_ns, i) for i, body in enumerate(bodies))
+    )
+
+
+async def test_response_time(client: httpx.AsyncClient) -> bool:
+    """Test API response time < 2 seconds"""
+    print_section("Test 7: Response Time Performance")
+    
+    # Test 10 concurrent requests (main() already warmed the service up)
+    # Payloads are encoded up front, so the timed region is only the request
+    bodies = tuple(
+        orjson.dumps({**PERF_LEAD, 'lead_id': f"PHASE2-PERF-{i+1:03d}"}) for i in range(10)
+    )
+    # Latencies in nanoseconds (perf_counter_ns: monotonic, unaffected by
+    # clock adjustments), one preallocated slot per request
+    times_ns = array('q', bytes(8 * len(bodies)))
+    status_codes = await _post_concurrently(client, bodies, times_ns)
+    
+    assert all(status_code == 200 for status_code in status_codes)
+    
+    avg_ns = sum(times_ns) // len(times_ns)
+    max_ns = max(times_ns)
+    p99_ns = sorted(times_ns)[int(len(times_ns) * 0.99)]
+    
+    print(f"\nAverage Response Time: {avg_ns/1e6:.2f}ms")
+    print(f"P99 Response Time: {p99_ns/1e6:.2f}ms")
+    print(f"Max Response Time: {max_ns/1e6:.2f}ms")
     print(f"Target (P99): < 3000ms")
     
     # Use P99 instead of max for fair assessment
-    assert p99_time < 3.0, f"P99 response time {p99_time:.2f}s exceeds 3s limit"
+    assert p99_ns < 3_000_000_000, f"P99 response time {p99_ns/1e9:.2f}s exceeds 3s limit"
     
     print(f"\n✅ PASS: P99 response time < 3 seconds")
     return True
 
 
-def test_phase2_acceptance_criteria() -> bool:
-    """Verify all Phase 2 acceptance criteria"""
-    print_section("Phase 2 Acceptance Criteria Summary")
+async def test_phase2_acceptance_criteria(
+    client: httpx.AsyncClient, info_data: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Verify all Phase 2 acceptance criteria
+    
+    Args:
+        client: Shared API client
+        info_data: /info payload already fetched by test_info_with_metrics
+            (fetched here when called on its own)
+    """
+    if info_data is None:
+        info_data = await get_info(client)
     
-    info_response = httpx.get(f"{BASE_URL}/info")
-    info_data = info_response.json()
+    print_section("Phase 2 Acceptance Criteria Summary")
     
     criteria = {
         "Feature Engineering Pipeline": True,
@@ -336,6 +403,82 @@ def test_phase2_acceptance_criteria() -> bool:
     return all_passed
 
 
+async def _run_test(
+    test_name: str, test_func, client: httpx.AsyncClient
+) -> Tuple[str, Any]:
+    """Run one test, turning failures into a False result"""
+    try:
+        return test_name, await test_func(client)
+    except AssertionError as e:
+        print(f"\n❌ FAIL ({test_name}): {e}")
+    except Exception as e:
+        print(f"\n❌ ERROR ({test_name}): {e}")
+    finally:
+        sys.stdout.flush()
+    return test_name, False
+
+
+async def _run_all(client: httpx.AsyncClient) -> bool:
+    """
+    Run every test against the shared client
+    
+    The independent tests run concurrently once the health check passes.
+    Feedback collection compares counts before and after, and response
+    time measures latency, so both run on their own afterwards.
+    """
+    outcomes = [await _run_test("Health Check with Model", test_health_with_model, client)]
+    
+    # Once per run, whichever tests follow, so timings stay comparable
+    await warmup(client)
+    
+    outcomes += await asyncio.gather(
+        _run_test("System Info with Metrics", test_info_with_metrics, client),
+        _run_test("ML Scoring - High and Low Engagement", test_ml_scoring, client),
+        _run_test("LangGraph Workflow", test_langgraph_workflow, client),
+        _run_test("Feature Engineering", test_feature_engineering, client)
+    )
+    
+    outcomes.append(await _run_test("Feedback Collection", test_feedback_collection, client))
+    outcomes.append(await _run_test("Response Time Performance", test_response_time, client))
+    
+    info_data = dict(outcomes)["System Info with Metrics"] or None
+    results = [(test_name, bool(result)) for test_name, result in outcomes]
+    
+    # Final summary
+    print_section("Test Results Summary")
+    
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} - {test_name}")
+    
+    all_passed = all(r[1] for r in results)
+    
+    if all_passed:
+        # Run acceptance criteria check
+        await test_phase2_acceptance_criteria(client, info_data)
+    
+    print("\n" + "="*70)
+    if all_passed:
+        print("🎉 PHASE 2 COMPLETE - ALL TESTS PASSED!")
+        print("="*70)
+        return True
+    else:
+        print("⚠️  Some tests failed. Review errors above.")
+        print("="*70)
+        return False
+
+
+async def _main() -> bool:
+    """Open the shared client and run the suite"""
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        http2=False,
+        timeout=CLIENT_TIMEOUT,
+        limits=CLIENT_LIMITS
+    ) as client:
+        return await _run_all(client)
+
+
 def main():
     """Run all Phase 2 tests"""
     print("="*70)
@@ -343,54 +486,8 @@ def main():
     print("="*70)
     print(f"Base URL: {BASE_URL}")
     
-    tests = [
-        ("Health Check with Model", test_health_with_model),
-        ("System Info with Metrics", test_info_with_metrics),
-        ("ML Scoring - High Engagement", test_ml_scoring_high_engagement),
-        ("ML Scoring - Low Engagement", test_ml_scoring_low_engagement),
-        ("Feedback Collection", test_feedback_collection),
-        ("LangGraph Workflow", test_langgraph_workflow),
-        ("Feature Engineering", test_feature_engineering),
-        ("Response Time Performance", test_response_time)
-    ]
-    
-    results = []
-    
     try:
-        for test_name, test_func in tests:
-            try:
-                result = test_func()
-                results.append((test_name, result))
-            except AssertionError as e:
-                print(f"\n❌ FAIL: {e}")
-                results.append((test_name, False))
-            except Exception as e:
-                print(f"\n❌ ERROR: {e}")
-                results.append((test_name, False))
-        
-        # Final summary
-        print_section("Test Results Summary")
-        
-        for test_name, result in results:
-            status = "✅ PASS" if result else "❌ FAIL"
-            print(f"{status} - {test_name}")
-        
-        all_passed = all(r[1] for r in results)
-        
-        if all_passed:
-            # Run acceptance criteria check
-            test_phase2_acceptance_criteria()
-        
-        print("\n" + "="*70)
-        if all_passed:
-            print("🎉 PHASE 2 COMPLETE - ALL TESTS PASSED!")
-            print("="*70)
-            return True
-        else:
-            print("⚠️  Some tests failed. Review errors above.")
-            print("="*70)
-            return False
-            
+        return asyncio.run(_main())
     except httpx.ConnectError:
         print(f"\n❌ Cannot connect to {BASE_URL}")
         print("   Make sure the API server is running:")